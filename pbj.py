@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
+# annotations are never evaluated, so `typing` (a few ms to import)
+# is only needed by type checkers. The bash wrapper starts a new
+# interpreter per command: only import here what every command uses,
+# and the rest (tempfile, textwrap, shlex, pbj_help...) where needed.
+from __future__ import annotations
+import bisect
+import contextlib
 import json
-import tempfile
-import textwrap
-from typing import Dict, OrderedDict, Tuple, Dict
+import re
+from collections.abc import ItemsView, KeysView, ValuesView
 import os # OS routines for NT or Posix depending on what system we're on.
+import stat
 import sys
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Iterator, Tuple
+try:
+    import fcntl # advisory file locks (posix only)
+except ImportError:
+    fcntl = None
 
 # You can change bookmarks_file valuevia config.json
 # you can change configuration_file value here,
@@ -13,6 +27,331 @@ bookmarks_file = "~/.config/pbj/bookmarks.json"
 configuration_file = "~/.config/pbj/config.json"
 BOOKMARKS_FILE = os.path.expanduser(bookmarks_file)
 CONFIG_FILE = os.path.expanduser(configuration_file)
+# bash lookup cache sourced by the pbj wrapper. Override it for both
+# by exporting PBJ_JUMP_CACHE before sourcing pbj.
+JUMP_CACHE_FILE = os.environ.get("PBJ_JUMP_CACHE") or os.path.join(os.path.dirname(CONFIG_FILE), "jump_cache.bash")
+# categories and keys for bash tab completion, sourced by the wrapper's
+# completer. Override it for both by exporting PBJ_COMPLETION_CACHE.
+COMPLETION_CACHE_FILE = os.environ.get("PBJ_COMPLETION_CACHE") or os.path.join(os.path.dirname(CONFIG_FILE), "completion.bash")
+# "time <TAB> path" per visit, appended by `record_visit()` and by the
+# bash wrapper (after jumps it resolves from the jump cache), and
+# folded into visit counts by `pbj_fuzzy`. Override it for both by
+# exporting PBJ_VISITS_FILE before sourcing pbj.
+VISITS_FILE = os.environ.get("PBJ_VISITS_FILE") or os.path.join(os.path.dirname(CONFIG_FILE), "visits.log")
+# signatures of config.json and bookmarks.json at the last successful
+# `initialize()`. While they match, startup skips validation.
+VALIDATION_STAMP_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "validated.json")
+# results of `pbj --check`, {path: [status, time checked, seconds]},
+# written by pbj_check. Listings mark the paths found dead less than
+# HEALTH_TTL seconds ago (see `get_dead_paths()`), without a stat.
+HEALTH_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "health.json")
+HEALTH_TTL: int = 24 * 3600
+HEALTH_DEAD_STATUSES: Tuple[str, ...] = ("missing", "inaccessible", "timeout")
+
+# json storage appends changes to "<bookmarks.json>.journal" instead of
+# rewriting bookmarks.json. Past this size, the journal is compacted
+# into a new bookmarks.json by a background process.
+JOURNAL_COMPACT_SIZE: int = 64 * 1024
+# past this size, the visits log is folded into visit counts by a
+# background process (see `fold_visits_if_large()`). Otherwise only a
+# fuzzy jump folds it, which exact-key jumps never get to.
+VISITS_FOLD_SIZE: int = 64 * 1024
+
+# `ls_category()`/`ls_all()` collect output lines and write them in
+# chunks of about this many characters.
+RENDER_CHUNK_SIZE: int = 64 * 1024
+# the characters `textwrap` treats as whitespace. Paths without any
+# that fit the width are printed as is, without wrapping.
+WRAP_WHITESPACE: str = "[\t\n\x0b\x0c\r ]"
+# tsv: escape what would break the columns or lines in a path
+TSV_ESCAPES: Dict[str, str] = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+TSV_SPECIAL: str = "[\\\\\t\n\r]"
+
+# values of the config.json "storage" key. "sqlite" keeps bookmarks
+# in a database next to bookmarks.json, "shards" in one file per
+# category under a manifest (see `get_storage_file()`).
+STORAGE_BACKENDS: Tuple[str, ...] = ("json", "sqlite", "shards")
+
+# initial config.json. `init_config_file()` adds any of
+# these keys that are missing from an existing config.json.
+DEFAULT_CONFIG: Dict[str, str] = {
+    "default_category": "default",
+    "bookmarks_file": BOOKMARKS_FILE,
+    "storage": "json",
+    "path_timeout": "2",
+    # read-only bookmark files under the user's, like $PATH, lowest
+    # precedence first. see pbj_layers.
+    "bookmark_layers": "",
+}
+
+# seconds a bookmarked directory gets to answer a stat (see
+# `stat_directory()`) before it counts as unavailable: a hung NFS
+# mount or a dead automount would otherwise freeze the prompt until
+# the kernel gives up. config.json "path_timeout" overrides it.
+PATH_TIMEOUT: float = 2.0
+
+# config.json parsed once per process. `load_config()` re-reads it
+# only when its signature (mtime, size, inode) changes, and
+# `set_config_value()` writes through. "reads" counts actual file reads.
+config_cache: Dict[str, object] = {
+    "signature": None,
+    "config": {},
+    "reads": 0,
+}
+
+# lock on "<bookmarks.json>.lock" held by this process, see
+# `lock_bookmarks()`. "depth" counts nested `with lock_bookmarks()`.
+lock_state: Dict[str, int] = {
+    "fd": -1,
+    "depth": 0,
+}
+
+# the pbj wrapper reads a block of shell commands from the file
+# descriptor it passes in PBJ_SHELL_FD, and `eval`s it: that's how
+# pbj.py changes the shell's cwd and current category. "fd" is that
+# descriptor (set by `main()`), or None when not run by the wrapper.
+# "commands" are queued by `hand_to_shell()`.
+shell_state: Dict[str, object] = {
+    "fd": None,
+    "commands": [],
+}
+SHELL_BLOCK_BEGIN: str = "# pbj shell commands: begin"
+SHELL_BLOCK_END: str = "# pbj shell commands: end"
+
+# the bookmarks dict last returned by `load_bookmarks()` (or indexed),
+# the storage signature it was read at (see `get_storage_signature()`),
+# and its index, built on first use by `get_bookmarks_index()` and kept
+# up to date by `apply_change()`.
+bookmarks_state: Dict[str, object] = {
+    "bookmarks": None,
+    "signature": None,
+    "index": None,
+}
+
+# the contents of HEALTH_FILE as of its "signature", see `get_dead_paths()`.
+health_state: Dict[str, object] = {
+    "signature": None,
+    "paths": {},
+}
+
+# "validated" is True once this process has validated both files, or
+# found them unchanged since the stamp. Only then do pbj's own writes
+# (which only write validated names) refresh the stamp. "stamp" is
+# the contents of VALIDATION_STAMP_FILE as of its "signature".
+validation_state: Dict[str, object] = {
+    "validated": False,
+    "stamp": {},
+    "signature": None,
+}
+
+class SortedDict(dict):
+    """
+    A dict that iterates in sorted key order, like the output of
+    `sort_bookmarks()`, and stays sorted: new keys are inserted at
+    their place with `bisect`, so nothing needs re-sorting after
+    a change. Pass `presorted=True` when `pairs` are known to be in
+    order already (a file pbj wrote, or sqlite rows) to skip sorting.
+    `resorted` tells whether `pairs` arrived out of order.
+    """
+    def __init__(self, pairs=(), presorted: bool = False) -> None:
+        dict.__init__(self, pairs)
+        self.keys_sorted: list[str] = list(dict.keys(self))
+        self.resorted: bool = False
+        if not presorted:
+            keys_sorted: list[str] = sorted(self.keys_sorted)
+            self.resorted = keys_sorted != self.keys_sorted
+            self.keys_sorted = keys_sorted
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self:
+            bisect.insort(self.keys_sorted, key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        dict.__delitem__(self, key)
+        del self.keys_sorted[bisect.bisect_left(self.keys_sorted, key)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys_sorted)
+
+    def __reversed__(self) -> Iterator[str]:
+        return reversed(self.keys_sorted)
+
+    def __repr__(self) -> str:
+        return f"SortedDict({list(self.items())})"
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.keys_sorted.clear()
+
+    def copy(self) -> "SortedDict":
+        return SortedDict(self.items(), presorted=True)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def pop(self, key: str, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> Tuple[str, object]:
+        if not self.keys_sorted:
+            raise KeyError("popitem(): dictionary is empty")
+        key: str = self.keys_sorted[-1]
+        return key, self.pop(key)
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+class LazyBookmarks(SortedDict):
+    """
+    Bookmarks whose categories are only decoded on first access, by
+    `load_category(category)`. The category names (in sorted order)
+    are known up front, so `in`, `len()` and iterating the names cost
+    nothing: a jump or a one-category listing decodes one category,
+    whatever the number of bookmarks. Whatever reads every category
+    (`-a`, the index, the fuzzy fallback, saving) decodes them all as
+    it goes, through `__getitem__`.
+
+    `find(category, keynum)`, if given, returns the path saved under a
+    key or number of a category not decoded yet (so as stored), or ""
+    for none, without decoding it (see `change_directory()`).
+
+    A category not decoded yet holds `None`: no set of them to build
+    on every load, see `is_pending()`.
+    """
+    def __init__(self, categories: list[str], load_category: Callable[[str], Dict[str, str]], find: Callable[[str, str], str] = None) -> None:
+        SortedDict.__init__(self, dict.fromkeys(categories), presorted=True)
+        self.load_category: Callable[[str], Dict[str, str]] = load_category
+        self.find: Callable[[str, str], str] = find
+
+    def __getitem__(self, category: str) -> Dict[str, str]:
+        items: Dict[str, str] = dict.__getitem__(self, category)
+        if items is None:
+            items = self.load_category(category)
+            dict.__setitem__(self, category, items)
+        return items
+
+    def is_pending(self, category: str) -> bool:
+        """Returns True if `category` is one not decoded yet."""
+        return category in self and dict.__getitem__(self, category) is None
+
+    def get(self, category: str, default=None):
+        return self[category] if category in self else default
+
+def append_to_journal(*changes: Tuple[str, ...], journal_file: str = None, durable: bool = False) -> bool:
+    """
+    Appends `changes` (see `commit_change()`) as JSON lines to the
+    journal next to bookmarks.json (or to `journal_file`), in a single
+    write, fsync'ed if `durable`. A line cut short by a crash is
+    skipped by `replay_journal()`.
+    """
+    if journal_file is None:
+        journal_file = get_storage_file("json") + ".journal"
+    try:
+        with lock_bookmarks(), open(journal_file, 'a+') as f:
+            line: str = "".join(json.dumps(change) + "\n" for change in changes)
+            # don't glue this line onto one cut short by a crash:
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    line = "\n" + line
+            f.write(line)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+    except OSError as e:
+        print(f"append_to_journal() Exception handling... {journal_file}\nexception type: {type(e).__name__}: \n{e}")
+        return False
+    return True
+
+def apply_change(bookmarks: Dict[str, Dict[str, str]], change: Tuple[str, ...]) -> None:
+    """
+    Applies `change` (see `commit_change()`) to `bookmarks`. Changes
+    whose target is already gone are skipped, as are snapshot records
+    (see `replay_journal()`). If `bookmarks` is indexed, the index is
+    updated in step.
+    """
+    index: Dict[str, dict] = None
+    if bookmarks_state["bookmarks"] is bookmarks:
+        index = bookmarks_state["index"]
+
+    op, args = change[0], change[1:]
+    if op == "save":
+        category, key, path = args
+        items: Dict[str, str] = bookmarks.setdefault(category, SortedDict())
+        if index and key in items:
+            index_remove(index, category, key, items[key])
+        items[key] = path
+        if index:
+            index_add(index, category, key, path)
+    elif op == "delete_key":
+        category, key = args
+        if key in bookmarks.get(category, {}):
+            path: str = bookmarks[category].pop(key)
+            if index:
+                index_remove(index, category, key, path)
+    elif op == "delete_category":
+        if args[0] in bookmarks:
+            items: Dict[str, str] = bookmarks.pop(args[0])
+            if index:
+                for key, path in items.items():
+                    index_remove(index, args[0], key, path)
+    elif op == "rename_key":
+        category, old_key, new_key = args
+        if old_key in bookmarks.get(category, {}):
+            path: str = bookmarks[category].pop(old_key)
+            bookmarks[category][new_key] = path
+            if index:
+                index_remove(index, category, old_key, path)
+                index_add(index, category, new_key, path)
+    elif op == "rename_category":
+        old_category, new_category = args
+        if old_category in bookmarks:
+            items: Dict[str, str] = bookmarks.pop(old_category)
+            bookmarks[new_category] = items
+            if index:
+                for key, path in items.items():
+                    index_remove(index, old_category, key, path)
+                    index_add(index, new_category, key, path)
+
+def bookmarks_are_resorted(bookmarks: Dict[str, Dict[str, str]]) -> bool:
+    """Returns `True` if `read_bookmarks_file()` had to sort any part of `bookmarks`."""
+    return any(getattr(items, "resorted", True) for items in [bookmarks, *bookmarks.values()])
+
+def bookmarks_file_is_sorted() -> bool:
+    """
+    Returns `True` if bookmarks.json is still the sorted file pbj last
+    wrote, per the "sorted" marker in VALIDATION_STAMP_FILE. Otherwise
+    (edited by hand, or never marked) it must be sorted when read.
+    """
+    signature: list[int] = list(get_file_signature(get_storage_file("json")))
+    return read_validation_stamp().get("sorted") == signature and signature != [0, 0, 0]
+
+def cache_is_stale(cache_file: str) -> bool:
+    """Returns `True` if `cache_file` is missing or older than bookmarks.json, config.json or a bookmark layer."""
+    cache_mtime: int = get_file_signature(cache_file)[0]
+    sources: Tuple[int, ...] = (
+        get_file_signature(get_storage_file())[0],
+        get_file_signature(CONFIG_FILE)[0],
+        *(get_file_signature(path)[0] for path in get_layer_files()),
+    )
+    return cache_mtime == 0 or any(cache_mtime < mtime for mtime in sources)
 
 def category_is_valid(value: str) -> bool:
     """
@@ -70,25 +409,48 @@ def change_default_category(bookmarks: Dict[str, Dict[str, str]], category: str
 
     return success
 
-def change_directory(bookmarks: Dict[str, Dict[str, str]], category: str, keynum: str) -> str:
+def change_directory(bookmarks: Dict[str, Dict[str, str]], category: str, keynum: str, fuzzy_category: str = None) -> str:
+    """
+    Changes to the directory saved under `keynum` (key or speed-dial
+    number) in `category`. If there is none, `keynum` is matched as a
+    fragment of keys and path components, in `fuzzy_category` or in all
+    categories, see `pbj_fuzzy.rank()`. Returns the new cwd, which is
+    unchanged if nothing matched, or if the directory is missing or
+    doesn't answer within the path timeout (see `stat_directory()`).
+    """
     num: int = -1 if not keynum.isdecimal() else int(keynum)
     target_path: str = ""
 
-    if category in bookmarks:
-        keys: list = list(bookmarks[category])
-        if 1 <= num <= len(keys):
-            target_path = bookmarks[category][keys[num - 1]]
-        elif keynum in bookmarks[category]:
-            target_path = bookmarks[category][keynum]
-        else:
-            target_path = os.getcwd()
-    else:
-        target_path = os.getcwd()
+    if category in bookmarks and isinstance(bookmarks, LazyBookmarks) and bookmarks.find and bookmarks.is_pending(category):
+        # as stored: binary search the index instead of decoding it all
+        target_path = bookmarks.find(category, keynum)
+    elif category in bookmarks:
+        items: Dict[str, str] = bookmarks[category]
+        if keynum in items:
+            target_path = items[keynum]
+        elif 1 <= num <= len(items):
+            target_path = items[list(items)[num - 1]] # keys are never numbers
+
+    if not target_path and num == -1:
+        import pbj_fuzzy # sqlite3 and all: only on a miss
+        target_path = pbj_fuzzy.best_match(bookmarks, keynum, fuzzy_category)
+    if not target_path:
+        return os.getcwd()
         
     target_path = os.path.expanduser(target_path)
-        
+    # os.chdir() on a hung mount would block until the kernel gives up.
+    # Once a stat has answered in time, the chdir doesn't wait on it.
+    status: str = stat_directory(target_path)
+    if status == "unavailable":
+        print(f"'{target_path}' did not answer within {get_path_timeout():g}s (hung mount?). path_timeout in config.json sets the wait.")
+        return os.getcwd()
+    elif status == "missing":
+        print(f"'{target_path}' is not an existing directory. `pbj --prune` removes such bookmarks.")
+        return os.getcwd()
+
     try:
         os.chdir(target_path)
+        record_visit(os.getcwd())
     except OSError as e:
         print(f"OSError: in `change_directory()`:")
         print(f"{type(e).__name__}")
@@ -216,10 +578,9 @@ def choose_key(bookmarks: Dict[str, Dict[str, str]], category: str) -> str:
     return choice  
 
 def change_category_name(bookmarks: Dict[str, Dict[str, str]], category_to_change: str, new_name: str) -> None:
-    value: Dict[str, str] = bookmarks[category_to_change]
-    del bookmarks[category_to_change]
-    bookmarks[new_name] = value
-    save_to_bookmarks_file(bookmarks)
+    change: Tuple[str, ...] = ("rename_category", category_to_change, new_name)
+    apply_change(bookmarks, change)
+    commit_change(bookmarks, change)
 
     # if changed category was default_category:
     default_category = get_config_value()
@@ -227,39 +588,211 @@ def change_category_name(bookmarks: Dict[str, Dict[str, str]], category_to_chang
         set_config_value(value=new_name)
 
 def change_key_name(bookmarks: Dict[str, Dict[str, str]], category: str, key_to_change: str, new_name: str) -> None:
-    value: str = bookmarks[category][key_to_change]
-    del bookmarks[category][key_to_change]
-    bookmarks[category][new_name] = value
-    save_to_bookmarks_file(bookmarks)
+    change: Tuple[str, ...] = ("rename_key", category, key_to_change, new_name)
+    apply_change(bookmarks, change)
+    commit_change(bookmarks, change)
+
+def commit_change(bookmarks: Dict[str, Dict[str, str]], change: Tuple[str, ...]) -> bool:
+    """
+    Persists `change`, which the caller has already applied to
+    `bookmarks`, using the configured storage backend:
+    - json: one line appended to the journal via `append_to_journal()`
+    - sqlite: a single-row statement via `pbj_sqlite.apply_change()`
+    - shards: the touched category's file via `pbj_shards.apply_change()`
+
+    Changes are tuples naming the operation and its arguments:
+    `("save", category, key, path)`, `("delete_key", category, key)`,
+    `("delete_category", category)`, `("rename_key", category, old,
+    new)` or `("rename_category", old, new)`.
+    """
+    return commit_changes(bookmarks, [change])
+
+def commit_changes(bookmarks: Dict[str, Dict[str, str]], changes: list[Tuple[str, ...]]) -> bool:
+    """
+    Like `commit_change()`, for any number of `changes`, persisted
+    together: one journal append (json), one transaction (sqlite), or
+    one write of each touched category and the manifest (shards).
+    """
+    with lock_bookmarks():
+        # has another shell written since `bookmarks` was loaded?
+        unchanged: bool = (
+            bookmarks_state["bookmarks"] is bookmarks
+            and bookmarks_state["signature"] == get_storage_signature()
+        )
+        # with bookmark layers, `bookmarks` is their merged view: only
+        # the user's layer under it is stored, see `pbj_layers`.
+        layered: bool = bool(get_config_value("bookmark_layers"))
+        if layered:
+            import pbj_layers
+            if not pbj_layers.apply_to_user_layer(bookmarks, changes):
+                return False
+        if not store_changes(changes):
+            return False
+
+        if unchanged:
+            bookmarks_state["signature"] = get_storage_signature()
+        else:
+            # re-read under the lock, merging the other shells' changes,
+            # so the jump cache neither drops nor revives their keys, and
+            # the caller sees the merged result.
+            reload_bookmarks(bookmarks)
+
+        # only the categories saved to can have gained a duplicate path
+        # (e.g. another shell saved the same directory under another key)
+        saved: list[str] = list(dict.fromkeys(change[1] for change in changes if change[0] == "save"))
+        dups: Dict[str, Dict[str, str]] = remove_duplicate_values(bookmarks, saved) if saved else {}
+        if dups:
+            deletes: list[Tuple[str, ...]] = [
+                ("delete_key", category, key) for category, items in dups.items() for key in items
+            ]
+            if layered:
+                pbj_layers.apply_to_user_layer(bookmarks, deletes)
+            store_changes(deletes)
+            bookmarks_state["signature"] = get_storage_signature()
+            report_duplicates(dups)
+        write_jump_cache(sort_bookmarks(bookmarks))
+        write_completion_cache(bookmarks)
+
+    journal_file: str = get_storage_file("json") + ".journal"
+    if get_config_value("storage") == "json" and get_file_signature(journal_file)[1] > JOURNAL_COMPACT_SIZE:
+        compact_journal(background=True)
+    return True
+
+def compact_journal(background: bool = False) -> bool:
+    """
+    Folds the journal into a new bookmarks.json, holding the
+    bookmarks lock. The journal is first renamed to
+    "<journal>.compacting", which `load_bookmarks()` also replays,
+    so a crash at any step loses nothing.
+
+    With `background`, compaction runs in a detached process (see
+    `run_detached()`) and this returns immediately.
+    """
+    if background:
+        run_detached(compact_journal)
+        return True
+
+    bookmarks_file: str = get_storage_file("json")
+    journal_file: str = bookmarks_file + ".journal"
+    compacting_file: str = journal_file + ".compacting"
+    with lock_bookmarks():
+        if not os.path.exists(compacting_file): # else left by a crashed compaction
+            try:
+                os.rename(journal_file, compacting_file)
+            except OSError:
+                return False
+
+        cache_was_fresh: bool = not jump_cache_is_stale()
+        completion_was_fresh: bool = not cache_is_stale(COMPLETION_CACHE_FILE)
+        bookmarks: Dict[str, Dict[str, str]] = {}
+        try:
+            with open(bookmarks_file, 'r') as f:
+                bookmarks = read_bookmarks_file(f, presorted=bookmarks_file_is_sorted())
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"compact_journal(): {type(e).__name__}: {e}")
+            return False
+        replay_journal(bookmarks, compacting_file, get_file_signature(bookmarks_file))
+
+        if not save_to_bookmarks_file(bookmarks, compacting=True):
+            return False
+        os.remove(compacting_file)
+        write_validation_stamp() # the stamp still has the removed journal
+        # the caches already hold these changes. keep them
+        # from looking older than the new bookmarks.json:
+        if cache_was_fresh:
+            os.utime(JUMP_CACHE_FILE)
+        if completion_was_fresh:
+            os.utime(COMPLETION_CACHE_FILE)
+    return True
+
+def dedupe_bookmarks(bookmarks: Dict[str, Dict[str, str]], categories: list[str] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Runs a full duplicate sweep over `categories` (default: all), and
+    commits the removals in a single write. Returns what was removed.
+    """
+    dups: Dict[str, Dict[str, str]] = remove_duplicate_values(bookmarks, categories)
+    changes: list[Tuple[str, ...]] = [
+        ("delete_key", category, key) for category, items in dups.items() for key in items
+    ]
+    if changes and not commit_changes(bookmarks, changes):
+        print("dedupe failed. nothing was removed.")
+        return {}
+    report_duplicates(dups)
+    return dups
 
 def delete_category(bookmarks: Dict[str, Dict[str, str]], category: str) -> bool:
     default_category: str = get_config_value()
     if category in bookmarks and category != default_category:
-        del bookmarks[category]
-        save_to_bookmarks_file(bookmarks)
-        return True
+        change: Tuple[str, ...] = ("delete_category", category)
+        apply_change(bookmarks, change)
+        return commit_change(bookmarks, change)
     else:
         return False
 
 def delete_key(bookmarks: Dict[str, Dict[str, str]], category: str, key: str) -> bool:
     if category in bookmarks and key in bookmarks[category]:
-        del bookmarks[category][key]
-        save_to_bookmarks_file(bookmarks)
-        return True
+        change: Tuple[str, ...] = ("delete_key", category, key)
+        apply_change(bookmarks, change)
+        return commit_change(bookmarks, change)
     else:
         return False
 
+def fold_visits_if_large() -> None:
+    """
+    Has the visits log folded into visit counts (see
+    `pbj_fuzzy.fold_visits()`) by a detached process, once it is past
+    VISITS_FOLD_SIZE. One stat otherwise.
+    """
+    if get_file_signature(VISITS_FILE)[1] <= VISITS_FOLD_SIZE:
+        return
+
+    def fold() -> bool:
+        import pbj_fuzzy # sqlite3 and all: in the detached process only
+        pbj_fuzzy.fold_visits()
+        return True
+    run_detached(fold)
+
+def get_bookmarks_index(bookmarks: Dict[str, Dict[str, str]]) -> Dict[str, dict]:
+    """
+    Returns indexes over `bookmarks`, building them on first use:
+    - "key_categories": key -> set of categories holding the key
+    - "path_entries": path -> set of (category, key) holding the path
+    - "category_paths": category -> {path: number of keys holding it}
+
+    The index is kept for the one dict last indexed, and
+    `apply_change()` updates it on each change to that dict.
+    """
+    if bookmarks_state["bookmarks"] is not bookmarks:
+        bookmarks_state["bookmarks"] = bookmarks
+        bookmarks_state["signature"] = None # not known to match storage
+        bookmarks_state["index"] = None
+    if bookmarks_state["index"] is None:
+        index: Dict[str, dict] = {
+            "key_categories": {},
+            "path_entries": {},
+            "category_paths": {},
+        }
+        for category, items in bookmarks.items():
+            index["category_paths"].setdefault(category, {})
+            for key, path in items.items():
+                index_add(index, category, key, path)
+        bookmarks_state["index"] = index
+    return bookmarks_state["index"]
+
+def get_config_reads() -> int:
+    """Returns how many times config.json was actually read by this process."""
+    return config_cache["reads"]
+
 def get_config_value(key: str ="default_category") -> str:
     # see list of values in `default_config` var
     # defined in init_config_file() definition.
     value = ""
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            value = json.load(f)[key]
-    except FileNotFoundError as e:
-        print(f"FileNotFoundError in get_default_cat(): {e}")
-        print("suggestions: create config file with `config_configs()`")
-    
+    if not os.path.exists(CONFIG_FILE):
+        print(f"FileNotFoundError in get_config_value(): {CONFIG_FILE}")
+        print("suggestions: create config file with `init_config_file()`")
+    else:
+        value = load_config().get(key, "")
+
     return value
 
 def get_current_category() -> str:
@@ -269,17 +802,131 @@ def get_current_category() -> str:
         current_category = default_category
     return current_category
 
+def get_dead_paths() -> Dict[str, str]:
+    """
+    Returns {path: status} of the bookmarked paths that the last
+    `pbj --check` found missing, inaccessible or hung, if it checked
+    them less than HEALTH_TTL seconds ago. Like `load_config()`,
+    HEALTH_FILE is only re-read when it has changed.
+    """
+    signature: Tuple[int, int, int] = get_file_signature(HEALTH_FILE)
+    if signature == (0, 0, 0):
+        return {}
+    if signature != health_state["signature"]:
+        health_state["signature"] = signature
+        try:
+            with open(HEALTH_FILE, 'r') as f:
+                health_state["paths"] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            health_state["paths"] = {}
+    import time
+    oldest: float = time.time() - HEALTH_TTL
+    return {
+        path: status
+        for path, (status, checked, _) in health_state["paths"].items()
+        if status in HEALTH_DEAD_STATUSES and checked >= oldest
+    }
+
+def get_file_signature(path: str) -> Tuple[int, int, int]:
+    """
+    Returns `(mtime_ns, size, inode)` of `path`, or `(0, 0, 0)` if
+    it cannot be stat'ed. Two equal signatures mean the file has
+    not been replaced or rewritten in between.
+    """
+    try:
+        st: os.stat_result = os.stat(path)
+    except OSError:
+        return (0, 0, 0)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def get_layer_files() -> list[str]:
+    """Returns the bookmark layer files of config.json, see `pbj_layers`."""
+    if not get_config_value("bookmark_layers"):
+        return []
+    import pbj_layers
+    return pbj_layers.layer_files()
+
+def get_user_bookmarks(bookmarks: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the user's own bookmarks under `bookmarks`, if that is the
+    loaded view of the bookmark layers (see `pbj_layers`): the layer
+    that is stored, and can change. Otherwise `bookmarks` itself.
+    """
+    if not get_config_value("bookmark_layers") or bookmarks is not bookmarks_state["bookmarks"]:
+        return bookmarks
+    import pbj_layers
+    return pbj_layers.layers_state["user"]
+
+def get_path_timeout() -> float:
+    value: str = get_config_value("path_timeout")
+    return float(value) if timeout_is_valid(value) else PATH_TIMEOUT
+
+def get_storage_signature() -> Tuple[Tuple[int, int, int], ...]:
+    """
+    Returns the signatures of every file `load_bookmarks()` reads:
+    the storage file and, for json storage, its journal files, then
+    the bookmark layers, if any, as one.
+    """
+    storage_file: str = get_storage_file()
+    signature: Tuple[Tuple[int, int, int], ...] = (get_file_signature(storage_file), *get_journal_signature())
+    if get_config_value("bookmark_layers"):
+        import pbj_layers
+        signature += (pbj_layers.layers_signature(pbj_layers.layer_files()),)
+    return signature
+
+def get_journal_signature() -> Tuple[Tuple[int, int, int], ...]:
+    """Returns the signatures of the journal and "<journal>.compacting" of the storage file."""
+    journal_file: str = get_storage_file() + ".journal"
+    return (get_file_signature(journal_file), get_file_signature(journal_file + ".compacting"))
+
+def get_storage_file(storage: str = None) -> str:
+    """
+    Returns the file holding the bookmarks for `storage` (by default
+    the configured "storage" backend): bookmarks.json itself, for
+    sqlite a database with the same name and a `.sqlite3` extension,
+    and for shards the manifest in a directory with a `.shards`
+    extension.
+    """
+    bookmarks_file: str = os.path.expanduser(get_config_value("bookmarks_file"))
+    storage = storage or get_config_value("storage")
+    if storage == "sqlite":
+        return os.path.splitext(bookmarks_file)[0] + ".sqlite3"
+    if storage == "shards":
+        return os.path.join(os.path.splitext(bookmarks_file)[0] + ".shards", "manifest.json")
+    return bookmarks_file
+
 def get_terminal_width() -> int:
     width: int 
     if sys.stdout.isatty():
         width = os.get_terminal_size().columns
     else:
-        swidth: str = os.environ.get("PBJ_TERM_WIDTH")
+        swidth: str = os.environ.get("PBJ_TERM_WIDTH", "80")
         width = 80 if not swidth.isdecimal() else int(swidth)
         if not swidth.isdecimal():
             print("Warning: sidth is not int")
     return width
 
+def index_add(index: Dict[str, dict], category: str, key: str, path: str) -> None:
+    index["key_categories"].setdefault(key, set()).add(category)
+    index["path_entries"].setdefault(path, set()).add((category, key))
+    paths: Dict[str, int] = index["category_paths"].setdefault(category, {})
+    paths[path] = paths.get(path, 0) + 1
+
+def index_remove(index: Dict[str, dict], category: str, key: str, path: str) -> None:
+    categories: set[str] = index["key_categories"].get(key, set())
+    categories.discard(category)
+    if not categories:
+        index["key_categories"].pop(key, None)
+    entries: set[Tuple[str, str]] = index["path_entries"].get(path, set())
+    entries.discard((category, key))
+    if not entries:
+        index["path_entries"].pop(path, None)
+    paths: Dict[str, int] = index["category_paths"].get(category, {})
+    if paths.get(path, 0) > 1:
+        paths[path] -= 1
+    else:
+        paths.pop(path, None)
+
 def initialize() -> bool:
     success: bool = True
     if not init_config_file():
@@ -302,9 +949,22 @@ def initialize() -> bool:
 
     return success
 
+def hand_to_shell(category: str = None, directory: str = None) -> bool:
+    """
+    Queues setting PBJ_CURRENT_CATEGORY to `category` and changing
+    to `directory` in the shell that ran the pbj wrapper, for
+    `write_shell_commands()` to hand over when pbj.py is done.
+    Returns `False` if pbj.py wasn't run by the wrapper.
+    """
+    if shell_state["fd"] is None:
+        return False
+    if category:
+        shell_state["commands"].append(f"PBJ_CURRENT_CATEGORY={shell_quote(category)}")
+    if directory:
+        shell_state["commands"].append(f"cd -- {shell_quote(directory)}")
+    return True
+
 def init_bookmarks_file() -> bool:
-    success: bool = True
-    
     # get path of bookmarks file from config. set config value if not set.
     bookmarks_file = get_config_value("bookmarks_file")
     if not bookmarks_file:
@@ -326,6 +986,31 @@ def init_bookmarks_file() -> bool:
         print(f"the directory/directories associated with \"bookmarks_file\" \nmust be created by user, or choose a path that exists.")
         return False
 
+    # sqlite storage: validate the database contents instead of bookmarks.json
+    if get_config_value("storage") == "sqlite":
+        import pbj_sqlite
+        db_read: Dict[str, Dict[str, str]] = pbj_sqlite.load_bookmarks(get_storage_file())
+        if not db_read:
+            print(f"No bookmarks found in {get_storage_file()}.")
+            print("Set \"storage\" back to \"json\" in config.json and run `pbj --migrate sqlite`.")
+        return validate_bookmarks(db_read)
+
+    # sharded storage: validate the shards instead of bookmarks.json
+    if get_config_value("storage") == "shards":
+        import pbj_shards
+        shards_read: Dict[str, Dict[str, str]] = pbj_shards.load_bookmarks(get_storage_file())
+        if not shards_read:
+            print(f"No bookmarks found in {os.path.dirname(get_storage_file())}.")
+            print("Set \"storage\" back to \"json\" in config.json and run `pbj --migrate shards`.")
+        if not validate_bookmarks(shards_read):
+            return False
+        # the manifest records the default category too (see
+        # `set_config_value()`). One that isn't a category is left to
+        # `init_default_category_resolve()`, which then sets both.
+        if get_config_value() in shards_read:
+            pbj_shards.check_default_category(get_storage_file(), get_config_value())
+        return True
+
     # determine option (r|w|x) for file access
     MODE_READ = 'r'
     MODE_WRITE = 'w'
@@ -362,54 +1047,13 @@ def init_bookmarks_file() -> bool:
         print(f"option: {option}")
         print(f"Exception handling {bookmarks_file} ({type(e).__name__} in init_bookmarks_file() ): \n{e}")
 
-    # check for user errors in file_read
-    # user error list:
-    errors_in_file_read: list[Tuple[str, str]] = []
-
-    if not file_read:
-        success = False
-    else:
-        for category, value in file_read.items():
-
-            cat_conditions: list[Tuple[bool, str]] = [
-                (not isinstance(category, str), "All categories must be double quoted. key-vals in config.json must be strings"),
-                (not category_is_valid(category), "Category name characters may only contain alphabet chars."),
-                (name_is_key(file_read, category), "Category names (outer-keys) must not be the same as key names (inner-keys)")
-            ]
-            for condition, message in cat_conditions:
-                if condition:
-                    success = False
-                    errors_in_file_read += [(category, message)]
-
-            for k, v in value.items():
-                key_conditions: list[Tuple[bool, str]] = [
-                    (not key_is_valid(k), "Keys may be alphanumeric; may have dots, but not leading/trailing dots."),
-                    (k in file_read, "keys (inner-keys) may not have same name as a category (outer-keys)."),
-                ]
-                val_conditions: list[Tuple[bool, str]] = [
-                    (not isinstance(v, str), "All keys and values in .json files must be double quoted unless surrounded by curly braces.")                   
-                ]
-                for condition, message in key_conditions: 
-                    if condition:
-                        success = False
-                        errors_in_file_read += [(k, message)]
-
-                for condition, message in val_conditions:
-                    if condition:
-                        success = False
-                        errors_in_file_read += [(v, message)]
-
-    if errors_in_file_read:
-        print(f"\nErrors found in bookmarks.json file ({CONFIG_FILE}):")
-        num: int = 0
-        for cat, msg in errors_in_file_read:
-            prefix: str = f"  {num + 1}) '{cat}: "
-            width: int = get_terminal_width()
-            wrapper = textwrap.TextWrapper(width, prefix, " " * len(prefix))
-            print(wrapper.fill(msg))
-            num += 1
+    # validate what `load_bookmarks()` reads: the file with its journals replayed
+    if isinstance(file_read, dict) and all(isinstance(items, dict) for items in file_read.values()):
+        journal_file: str = get_storage_file("json") + ".journal"
+        for replayed_file in (journal_file + ".compacting", journal_file):
+            replay_journal(file_read, replayed_file, get_file_signature(get_storage_file("json")))
 
-    return success
+    return validate_bookmarks(file_read)
 
 def init_config_file() -> bool:
     # return value
@@ -423,10 +1067,6 @@ def init_config_file() -> bool:
         print(f"User must create required directories. Create `{config_file_dirs}' and run pbj again.")
         return False
     
-    # initial config default values:
-    default_category: str = "default"
-    bookmarks_file: str = BOOKMARKS_FILE
-            
     # determine option (r|w|x) for file access
     MODE_READ = 'r'
     MODE_WRITE = 'w'
@@ -442,23 +1082,20 @@ def init_config_file() -> bool:
 
     # we're going to access the file, but first
     # define initial default values:
-    default_config: Dict[str, str] = {
-        "default_category": default_category,
-        "bookmarks_file": bookmarks_file
-    }
+    default_config: Dict[str, str] = dict(DEFAULT_CONFIG)
 
     # whatever is in the file will be saved here:
     file_read: Dict[str, str] = {}
 
     # file access: read/write-to/create file:
     try:
-        with open(CONFIG_FILE, option) as f:
-            try:
-                if option == MODE_CREATE or option == MODE_WRITE:
-                    json.dump(default_config, f, indent=4, sort_keys=True)
-                file_read = json.load(f) 
-            except json.JSONDecodeError as je:
-                print(f"json.json.JSONDecodeError in init_config_file(): \n{je}")
+        if option == MODE_CREATE or option == MODE_WRITE:
+            with open(CONFIG_FILE, option) as f:
+                json.dump(default_config, f, indent=4, sort_keys=True)
+            file_read = dict(default_config)
+        else:
+            # parsed once here, then served from memory to get_config_value()
+            file_read = dict(load_config())
     except Exception as e:
         print(f"option: {option}")
         print(f"Exception handling {CONFIG_FILE} ({type(e).__name__}): \n{e}")
@@ -496,6 +1133,8 @@ def init_config_file() -> bool:
 
             value_conditions: list[Tuple[bool, str]] = [
                 (not isinstance(v, str), "All key-vals inside braces must be a double quoted string."),
+                (k == "storage" and v not in STORAGE_BACKENDS, f"\"storage\" must be one of: {', '.join(STORAGE_BACKENDS)}"),
+                (k == "path_timeout" and not timeout_is_valid(v), "\"path_timeout\" must be a number of seconds greater than 0, e.g. \"2\""),
             ]
             for condition, message in value_conditions:
                 if condition:
@@ -510,6 +1149,7 @@ def init_config_file() -> bool:
     
     # print errors if any:
     if errors_in_file_read:
+        import textwrap
         num: int = 0
         for kv, msg in errors_in_file_read:
             prefix: str = f"  {num + 1}) '{kv}: "
@@ -526,6 +1166,14 @@ def init_default_category_resolve() -> bool:
         return False
     return True
     
+def jump_cache_is_stale() -> bool:
+    """
+    Returns `True` if the bash jump cache is missing or older than
+    bookmarks.json or config.json. The wrapper uses the same test
+    (`-ot`) to decide when to fall through to pbj.py.
+    """
+    return cache_is_stale(JUMP_CACHE_FILE)
+
 def key_is_valid(key: str) -> bool:
     """Returns `True` if:
     - key arg does not have preceeding or trailing dot (`.`) characters
@@ -547,49 +1195,260 @@ def key_is_valid(key: str) -> bool:
     
     return False not in values
 
-def ls_all(bookmarks: Dict[str, Dict[str, str]]) -> None:
-    for category in bookmarks:
-        ls_category(bookmarks, category)
-        print("")
+def ls_all(bookmarks: Dict[str, Dict[str, str]], fmt: str = "text") -> None:
+    render_bookmarks(bookmarks, list(bookmarks), fmt, separate=True)
 
-def ls_category(bookmarks: Dict[str, Dict[str, str]], category: str) -> None:
+def ls_category(bookmarks: Dict[str, Dict[str, str]], category: str, fmt: str = "text") -> None:
     if category in bookmarks:
-        keys = list(bookmarks[category])
-        print(f"paths found in `{category}':")
-    #     for i, key in enumerate(keys):
-    #         value = bookmarks[category][key]
-    #         if len(value) > 80:
-    #             value = value[:30] + "..." + value[-40:]
-    #         print(f"   {i+1}) {key}: {value}")
-    # else:
-    #     return
-        for i, key in enumerate(keys):
-            prefix: str = f"    {i + 1}) {key}: "
-            width: int = get_terminal_width() 
-            wrapper = textwrap.TextWrapper(width, prefix, " " * len(prefix))
-            value: str = bookmarks[category][key]
-            # if len(value) > 80:
-            #     fmt: str = value
-            #     value = fmt[:30] + "..." + fmt[-40:]
-            print(wrapper.fill(value))
+        render_bookmarks(bookmarks, [category], fmt)
+
+def load_checked_bookmarks(force: bool = False) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the bookmarks, loaded after `initialize()` validated them
+    and config.json if either changed since the last validation (or
+    with `force`), and swept for what a file edited outside pbj may
+    hold. Returns `None` if the validation failed. Run on every start
+    of pbj.py, and on reloads of the daemon (see `pbj_daemon.serve()`).
+    """
+    # verify config.json & bookmarks.json. Validate all
+    # .json data. Create starter files if they dont exist.
+    # verify that default_category matches a category in 
+    # bookmarks.json. Bash script (pbj-liason) depends on success.
+    # skipped if neither file changed since the last validation.
+    validated: bool = force or not validation_is_current()
+    if validated:
+        if not initialize():
+            return None
+        write_validation_stamp(force=True)
+    bookmarks: Dict[str, Dict[str, str]] = load_bookmarks()
+    # a file edited outside pbj may hold duplicates that no save has
+    # checked for: sweep all categories once.
+    if validated:
+        dedupe_bookmarks(bookmarks)
+        # ...or a name that is a key of a bookmark layer and one of the
+        # user's categories, or the other way round
+        if get_config_value("bookmark_layers"):
+            import pbj_layers
+            pbj_layers.report_clashes(bookmarks)
+    # the wrapper fell through to pbj.py if the cache was stale. e.g.
+    # bookmarks.json was edited by hand or the default category changed.
+    # After a validation, rewrite them anyway: a shard edited by hand
+    # leaves the manifest, which the caches are checked against, as is.
+    if validated or jump_cache_is_stale():
+        write_jump_cache(bookmarks)
+    if validated or cache_is_stale(COMPLETION_CACHE_FILE):
+        write_completion_cache(bookmarks)
+    return bookmarks
 
 def load_bookmarks() -> Dict[str, Dict[str, str]]: 
+    if get_config_value("storage") == "sqlite":
+        import pbj_sqlite
+        with lock_bookmarks(shared=True):
+            signature: Tuple[Tuple[int, int, int], ...] = get_storage_signature()
+            # rows come back in key order; no sorting needed
+            rows: Dict[str, Dict[str, str]] = pbj_sqlite.load_bookmarks(get_storage_file())
+        bookmarks: Dict[str, Dict[str, str]] = SortedDict(
+            ((category, SortedDict(items, presorted=True)) for category, items in rows.items()),
+            presorted=True,
+        )
+        bookmarks = merge_layers(bookmarks)
+        set_loaded_bookmarks(bookmarks, signature)
+        return bookmarks
+
+    if get_config_value("storage") == "shards":
+        import pbj_shards
+        with lock_bookmarks(shared=True):
+            signature: Tuple[Tuple[int, int, int], ...] = get_storage_signature()
+            bookmarks: Dict[str, Dict[str, str]] = pbj_shards.load_bookmarks_lazily(get_storage_file())
+        bookmarks = merge_layers(bookmarks)
+        set_loaded_bookmarks(bookmarks, signature)
+        return bookmarks
+
     bookmarks_file: str = get_config_value("bookmarks_file")
     bookmarks_file = os.path.expanduser(bookmarks_file)
-    bookmarks: dict[str, Dict[str, str]] = {}
+    bookmarks: dict[str, Dict[str, str]] = SortedDict()
+    journal_file: str = bookmarks_file + ".journal"
+    resorted: bool = False
+
+    # shared lock: snapshot and journal must not be read halfway
+    # through a compaction that moves changes from one to the other.
+    with lock_bookmarks(shared=True):
+        signature: Tuple[Tuple[int, int, int], ...] = get_storage_signature()
+        presorted: bool = bookmarks_file_is_sorted()
+        # with a binary index of this very file, decode categories as
+        # they are used. Otherwise parse it all, and index it.
+        lazy: LazyBookmarks = load_bookmarks_lazily(bookmarks_file, signature[0])
+        if lazy is not None:
+            bookmarks = lazy
+        else:
+            try:
+                with open(bookmarks_file, 'r') as f:
+                    try:
+                        bookmarks = read_bookmarks_file(f, presorted)
+                        resorted = bookmarks_are_resorted(bookmarks)
+                    except json.JSONDecodeError as je:
+                        print(f"json.JSONDecodeError in load_bookmarks(): \n{je}")
+            except FileNotFoundError:
+                print("FileNotFoundError (load())")
+            # (a resorted file is indexed when written back, below)
+            if bookmarks and not resorted:
+                import pbj_index
+                pbj_index.build_index(bookmarks_file + ".index", bookmarks, signature[0])
+
+        # changes saved since bookmarks.json was last written. oldest
+        # first. `apply_change()` keeps them in sorted order:
+        replay_journal(bookmarks, journal_file + ".compacting", signature[0])
+        replay_journal(bookmarks, journal_file, signature[0])
+
+    if resorted:
+        # bookmarks.json was edited by hand. write it back sorted,
+        # once, unless another shell wrote in the meantime:
+        with lock_bookmarks():
+            if get_storage_signature() == signature and save_to_bookmarks_file(bookmarks):
+                signature = get_storage_signature()
+    elif not presorted and signature[0] != (0, 0, 0):
+        # already in order, only the marker was missing:
+        mark_bookmarks_file_sorted()
+    bookmarks = merge_layers(bookmarks)
+    set_loaded_bookmarks(bookmarks, signature)
+    return bookmarks
 
+def load_bookmarks_lazily(bookmarks_file: str, signature: Tuple[int, int, int]) -> LazyBookmarks:
+    """
+    Returns the bookmarks of `bookmarks_file` as a `LazyBookmarks`
+    backed by its binary index (see `pbj_index`): categories are
+    decoded from the index when used, and jumps into the others are
+    binary searched in it. Returns None if there is no index built
+    from the version of the file with `signature`. The mapping is
+    kept, so later reads see this version even after a rebuild.
+    """
+    import pbj_index
+    index = pbj_index.open_index(bookmarks_file + ".index", signature)
+    if index is None:
+        return None
+    # sorted, so a category's slot is found by bisection: no name ->
+    # slot dict to build on every load
+    names: list[str] = pbj_index.category_names(index)
+
+    def load_category(category: str) -> Dict[str, str]:
+        return SortedDict(pbj_index.items(index, pbj_index.find_category(names, category)), presorted=True)
+
+    def find(category: str, keynum: str) -> str:
+        return pbj_index.find(index, pbj_index.find_category(names, category), keynum)
+    return LazyBookmarks(names, load_category, find)
+
+def load_config() -> Dict[str, str]:
+    """
+    Returns the parsed contents of config.json. The file is only
+    read when it has changed since the last read (or write through
+    `set_config_value()`); otherwise the cached dict is returned.
+    Callers must not modify the returned dict.
+    """
+    signature: Tuple[int, int, int] = get_file_signature(CONFIG_FILE)
+    if signature == config_cache["signature"]:
+        return config_cache["config"]
+
+    config: Dict[str, str] = {}
     try:
-        with open(bookmarks_file, 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
+            config_cache["reads"] += 1
             try:
-                bookmarks = json.load(f)
+                config = json.load(f)
             except json.JSONDecodeError as je:
-                print(f"json.JSONDecodeError in load_bookmarks(): \n{je}")
+                print(f"json.JSONDecodeError in load_config(): \n{je}")
     except FileNotFoundError:
-        print("FileNotFoundError (load())")
+        signature = None
 
-    # sorting is redundant in case user modifies bookmarks.json manually
-    bookmarks = sort_bookmarks(bookmarks) 
-    return bookmarks
+    config_cache["signature"] = signature
+    config_cache["config"] = config
+    return config
+
+@contextlib.contextmanager
+def lock_bookmarks(shared: bool = False) -> Iterator[None]:
+    """
+    Holds an advisory lock (`flock`) on "<bookmarks.json>.lock" for
+    the duration of a `with` block: exclusive for writers, `shared`
+    for readers. Every read-modify-write of stored bookmarks (either
+    backend) happens under it, so concurrent shells can't interleave.
+
+    Nested use in one process keeps the outer lock. Without `fcntl`
+    (not posix), this does nothing.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    if lock_state["depth"] == 0:
+        lock_file: str = get_storage_file("json") + ".lock"
+        fd: int = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        lock_state["fd"] = fd
+    lock_state["depth"] += 1
+    try:
+        yield
+    finally:
+        lock_state["depth"] -= 1
+        if lock_state["depth"] == 0:
+            os.close(lock_state["fd"]) # releases the lock
+            lock_state["fd"] = -1
+
+def mark_bookmarks_file_sorted() -> None:
+    """Records the current bookmarks.json as sorted, see `bookmarks_file_is_sorted()`."""
+    stamp: Dict[str, list[int]] = dict(read_validation_stamp())
+    stamp["sorted"] = list(get_file_signature(get_storage_file("json")))
+    try:
+        write_file_atomically(VALIDATION_STAMP_FILE, json.dumps(stamp))
+    except OSError:
+        pass # unmarked just means sorting on the next load
+
+def merge_layers(bookmarks: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the user's `bookmarks` over the bookmark layers of
+    config.json, merged (see `pbj_layers`), or `bookmarks` itself if
+    there are none.
+    """
+    if not get_config_value("bookmark_layers"):
+        return bookmarks
+    import pbj_layers
+    return pbj_layers.merge_layers(bookmarks)
+
+def migrate_storage(bookmarks: Dict[str, Dict[str, str]], storage: str) -> bool:
+    """
+    Copies `bookmarks` (loaded from the current backend) into the
+    `storage` backend, then switches config.json "storage" to it.
+    The old copy is left in place. Migrating from sqlite or shards
+    back to json rewrites bookmarks.json, and migrating to shards
+    rewrites every shard: this converts between the single-file and
+    sharded layouts either way.
+    """
+    if storage not in STORAGE_BACKENDS:
+        print(f"Unknown storage '{storage}'. Choices: {', '.join(STORAGE_BACKENDS)}")
+        return False
+    if storage == get_config_value("storage"):
+        print(f"storage is already '{storage}'")
+        return False
+
+    # not the bookmark layers, if any: they stay where they are
+    user: Dict[str, Dict[str, str]] = get_user_bookmarks(bookmarks)
+    success: bool = False
+    if storage == "sqlite":
+        import pbj_sqlite
+        success = pbj_sqlite.replace_bookmarks(get_storage_file("sqlite"), sort_bookmarks(user))
+    elif storage == "shards":
+        import pbj_shards
+        success = pbj_shards.replace_bookmarks(get_storage_file("shards"), sort_bookmarks(user))
+    else:
+        success = save_to_bookmarks_file(user)
+
+    # set_config_value() re-stamps validation against the new file
+    if success and set_config_value("storage", storage):
+        write_jump_cache(sort_bookmarks(bookmarks))
+        write_completion_cache(bookmarks)
+        print(f"bookmarks migrated to '{storage}' storage: {get_storage_file()}")
+    else:
+        print("migration failed. storage not changed.")
+        success = False
+    return success
 
 def name_is_key(bookmarks: Dict[str, Dict[str, str]], key: str) -> bool:
     """
@@ -602,36 +1461,234 @@ def name_is_key(bookmarks: Dict[str, Dict[str, str]], key: str) -> bool:
     Returns:
         bool: _description_
     """
-    for category in bookmarks:
-        if key in bookmarks[category]:
-            return True
-    return False
+    return key in get_bookmarks_index(bookmarks)["key_categories"]
+
+def read_bookmarks_file(f, presorted: bool = False) -> Dict[str, Dict[str, str]]:
+    """
+    Parses bookmarks.json from the open file `f` into SortedDicts.
+    Unless `presorted`, categories and keys are sorted as they are
+    read, and `bookmarks_are_resorted()` tells whether any weren't.
+    """
+    return json.load(f, object_pairs_hook=lambda pairs: SortedDict(pairs, presorted))
+
+def read_validation_stamp() -> Dict[str, list[int]]:
+    """
+    Returns the contents of VALIDATION_STAMP_FILE, or `{}`. Like
+    `load_config()`, the file is only re-read when it has changed.
+    """
+    signature: Tuple[int, int, int] = get_file_signature(VALIDATION_STAMP_FILE)
+    if signature != validation_state["signature"]:
+        validation_state["signature"] = signature
+        try:
+            with open(VALIDATION_STAMP_FILE, 'r') as f:
+                validation_state["stamp"] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            validation_state["stamp"] = {}
+    return validation_state["stamp"]
+
+def record_visit(path: str) -> None:
+    # one short append, atomic next to the wrapper's appends
+    import time
+    try:
+        with open(VISITS_FILE, 'a') as f:
+            f.write(f"{int(time.time())}\t{path}\n")
+    except OSError:
+        pass # visits only affect fuzzy ranking
+
+def reload_bookmarks(bookmarks: Dict[str, Dict[str, str]]) -> None:
+    """Replaces the contents of `bookmarks` with the bookmarks as stored now, and records it as loaded."""
+    loaded: Dict[str, Dict[str, str]] = load_bookmarks()
+    bookmarks.clear()
+    bookmarks.update(loaded)
+    bookmarks_state["bookmarks"] = bookmarks # index rebuilt on next use
+
+def remove_duplicate_values(bookmarks: Dict[str, Dict[str, str]], categories: list[str] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Removes, from each of `categories` (default: all), the keys whose
+    path an earlier key of the category already holds. Returns the
+    removed {category: {key: path}} for reporting.
+
+    A full sweep is only needed after bookmarks were edited outside
+    pbj: `commit_changes()` passes just the categories it saved to.
+    If `bookmarks` is indexed, the per-category path counts are used
+    to skip the categories that hold no duplicate.
+    """
+    index: Dict[str, dict] = None
+    if bookmarks_state["bookmarks"] is bookmarks:
+        index = bookmarks_state["index"]
+
+    # with bookmark layers, only the user's own keys can go
+    user: Dict[str, Dict[str, str]] = get_user_bookmarks(bookmarks)
 
-def remove_duplicate_values(bookmarks: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
     found_dups: set[str] = set()
-    duplicates: Dict[str, str] = {}
     all_duplicates: Dict[str, Dict[str, str]] = {}
-    for category, item in bookmarks.items():
-        duplicates.clear()
+    for category in (list(bookmarks) if categories is None else categories):
+        if category not in bookmarks:
+            continue
+        if index and all(count == 1 for count in index["category_paths"].get(category, {}).values()):
+            continue
         found_dups.clear()
         # catch all duplicate values
-        for key, path in item.items():
-            if path in found_dups:
-                duplicates[key] = path
+        for key, path in bookmarks[category].items():
+            if path in found_dups and (user is bookmarks or key in user.get(category, {})):
+                all_duplicates.setdefault(category, {})[key] = path
             else:
                 found_dups.add(path)
-        # save duplicates for reporting
-        if len(duplicates) > 0:
-            for k, p in duplicates.items():
-                all_duplicates.setdefault(category, {})[k] = p
 
-        # delete found duplicates from bookmarks
+    # delete found duplicates from bookmarks (and the index, in step)
+    for category, duplicates in all_duplicates.items():
         for key in duplicates:
-            del bookmarks[category][key]
+            apply_change(bookmarks, ("delete_key", category, key))
     # return the found duplicates for reporting
     return all_duplicates
     
-def save_to_category(bookmarks: Dict[str, Dict[str, str]], category: str, key: str, path: str = os.getcwd()) -> bool:
+def render_bookmarks(bookmarks: Dict[str, Dict[str, str]], categories: list[str], fmt: str = "text", separate: bool = False) -> None:
+    """
+    Writes the bookmarks of `categories` to stdout, numbered like the
+    speed-dial numbers, in chunks of about RENDER_CHUNK_SIZE.
+    - text: a header per category, and paths wrapped to the terminal
+      width under their `num) key: ` prefix. With `separate`, a blank
+      line follows each category. Paths found dead by `pbj --check`
+      are followed by their status.
+    - tsv: `category <TAB> num <TAB> key <TAB> path`, escaped
+    - jsonl: `{"category": ..., "number": ..., "key": ..., "path": ...}`
+    """
+    out = sys.stdout # looked up per call: the daemon redirects it
+    width: int = get_terminal_width() if fmt == "text" else 0
+    # wrapping only depends on the prefix length, so one wrapper per length:
+    wrappers: Dict[int, textwrap.TextWrapper] = {}
+    # paths `pbj --check` found dead are marked, e.g. "/mnt/old [missing]"
+    dead: Dict[str, str] = get_dead_paths() if fmt == "text" else {}
+    wrap_whitespace: re.Pattern = re.compile(WRAP_WHITESPACE)
+    tsv_special: re.Pattern = re.compile(TSV_SPECIAL)
+    chunk: list[str] = []
+    size: int = 0
+    for category in categories:
+        lines: list[str] = []
+        if fmt == "text":
+            lines.append(f"paths found in `{category}':")
+        for i, (key, value) in enumerate(bookmarks[category].items(), 1):
+            if fmt == "tsv":
+                lines.append(f"{category}\t{i}\t{key}\t{tsv_special.sub(lambda m: TSV_ESCAPES[m.group()], value)}")
+            elif fmt == "jsonl":
+                lines.append(json.dumps({"category": category, "number": i, "key": key, "path": value}))
+            else:
+                prefix: str = f"    {i}) {key}: "
+                if value in dead:
+                    value = f"{value} [{dead[value]}]"
+                if len(prefix) + len(value) <= width and not wrap_whitespace.search(value):
+                    lines.append(prefix + value) # what the wrapper would return
+                    continue
+                if len(prefix) not in wrappers:
+                    import textwrap # only for paths that need wrapping
+                    indent: str = " " * len(prefix)
+                    wrappers[len(prefix)] = textwrap.TextWrapper(width, indent, indent)
+                filled: str = wrappers[len(prefix)].fill(value)
+                lines.append(prefix + filled[len(prefix):] if filled else "")
+        if separate and fmt == "text":
+            lines.append("")
+
+        chunk.append("\n".join(lines) + "\n")
+        size += len(chunk[-1])
+        if size >= RENDER_CHUNK_SIZE:
+            out.write("".join(chunk))
+            chunk, size = [], 0
+    out.write("".join(chunk))
+    out.flush()
+
+def report_duplicates(dups: Dict[str, Dict[str, str]]) -> None:
+    # print a report of which duplicates in their categories were deleted:
+    if len(dups) > 0:
+        print("deleted duplicate key-values:")
+        for category in dups:
+            print(f"{category}:")
+            for key, path in dups[category].items():
+                print(f"  {key}: {path}")
+
+def report_jump(start_dir: str, target: str) -> None:
+    """
+    Has the wrapper's shell change to `target`, the cwd after a jump,
+    unless it is still `start_dir` (nothing matched): `cd` to the same
+    dir would reset OLDPWD. Without the wrapper (pbj.py run by hand,
+    or the daemon, whose reply the wrapper reads as the path), prints
+    `target` instead, again only if it changed.
+    """
+    if target == start_dir:
+        return
+    if shell_state["fd"] is None:
+        print(target)
+    else:
+        hand_to_shell(directory=target)
+
+def replay_journal(bookmarks: Dict[str, Dict[str, str]], journal_file: str, snapshot: Tuple[int, int, int]) -> int:
+    """
+    Applies the changes recorded in `journal_file` to `bookmarks`, the
+    snapshot whose file signature is `snapshot`, and returns how many
+    were applied. A missing journal is empty. Lines that don't parse
+    (a write cut short by a crash) are skipped.
+
+    Replaying changes the snapshot already holds is not harmless: after
+    "rename a b" and "save a", replaying the rename again moves the new
+    a over b. So a write of bookmarks.json that folds in a journal first
+    appends a `("snapshot", mtime_ns, size, inode)` record of the new
+    file to it (see `save_to_bookmarks_file()`). Should the journal
+    outlive the write (a crash before its removal), the changes up to
+    the record matching `snapshot` are skipped. After a hand edit no
+    record matches, and the whole journal is replayed.
+    """
+    changes: list[Tuple[str, ...]] = []
+    try:
+        with open(journal_file, 'r') as f:
+            for line in f:
+                try:
+                    change: Tuple[str, ...] = tuple(json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    continue
+                if change[:1] == ("snapshot",) and list(change[1:]) == list(snapshot):
+                    changes = [] # all in `snapshot` already
+                else:
+                    changes.append(change)
+    except FileNotFoundError:
+        pass
+    applied: int = 0
+    for change in changes:
+        try:
+            apply_change(bookmarks, change)
+            applied += 1
+        except (ValueError, TypeError, IndexError):
+            continue
+    return applied
+
+def run_detached(work: Callable[[], bool]) -> None:
+    """
+    Runs `work` in a detached process, and returns as soon as it has
+    started. Where there is no `os.fork()`, runs it in this one.
+    """
+    if not hasattr(os, "fork"):
+        work()
+        return
+    pid: int = os.fork()
+    if pid:
+        os.waitpid(pid, 0) # first child exits at once, see below
+        return
+    # detach: the grandchild is reparented, and must not hold the
+    # terminal, or the shell fd that the bash wrapper reads until
+    # it is closed (see `hand_to_shell()`).
+    if os.fork():
+        os._exit(0)
+    success: bool = False
+    try:
+        devnull: int = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        if shell_state["fd"] is not None:
+            os.close(shell_state["fd"])
+            shell_state["fd"] = None
+        success = work()
+    finally: # never back into the caller's code
+        os._exit(0 if success else 1)
+
+def save_to_category(bookmarks: Dict[str, Dict[str, str]], category: str, key: str, path: str = None) -> bool:
     """
     Assigns a`path`value to`key`in
     specified`category`. This`Dict[str,
@@ -652,6 +1709,9 @@ def save_to_category(bookmarks: Dict[str, Dict[str, str]], category: str, key: s
         key (str): key* of `Dict[str,Dict[str*, str]]`
         path (str, optional): value* of`Dict[str, Dict[str, str*]]`Defaults to`os.getcwd().`
     """
+    # resolved per call, not at import: the daemon changes cwd per request.
+    if path is None:
+        path = os.getcwd()
     path = os.path.expanduser(os.path.abspath(path))
     success = False
 
@@ -675,7 +1735,7 @@ def save_to_category(bookmarks: Dict[str, Dict[str, str]], category: str, key: s
         return success
 
     if category in bookmarks: 
-        if value_found_in_dict(bookmarks[category], path):
+        if value_found_in_category(bookmarks, category, path):
             print(f"This path is already saved in {category}:")
             return success
 
@@ -688,60 +1748,83 @@ def save_to_category(bookmarks: Dict[str, Dict[str, str]], category: str, key: s
 
         
     # save key-value to category in local bookmarks dict
-    bookmarks.setdefault(category, {})[key] = path
-        ######################
-        # this is kind of the same as:
-        # if category in bookmarks:
-        #     bookmarks[category][key] = path
-        # else:
-        #     bookmarks[category] = {key: path}
+    change: Tuple[str, ...] = ("save", category, key, path)
+    apply_change(bookmarks, change)
     
     # save bookmarks to file:
-    if save_to_bookmarks_file(bookmarks):
+    if commit_change(bookmarks, change):
         print(f"saved to '{key}' in category: '{category}':")
         print(f"'{path}'")
         success = True
     else:
-        print("`save_to_bookmarks_file()` failed in `save_to_category()`")
+        print("`commit_change()` failed in `save_to_category()`")
         success = False
     
     return success
 
-def save_to_bookmarks_file(bookmarks: Dict[str, Dict[str, str]]) -> bool:
+def save_to_bookmarks_file(bookmarks: Dict[str, Dict[str, str]], compacting: bool = False) -> bool:
     """
     Save all paths to BOOKMARKS_FILE. This includes all
     new key-path items. All old key-path values in all
     categories are rewritten to the file.
 
+    `bookmarks` replaces everything in the journal, which is
+    removed. Unless `compacting`: then `compact_journal()` has
+    taken the part of the journal it wrote, and newer changes in
+    the journal (and the jump cache they produced) are kept.
+
     Args:
         bookmarks (dict[str, str]): 
     """
     # prepare bookmarks with sorting and pruning:
     # sort bookmarks:
     bookmarks = sort_bookmarks(bookmarks)
-    # prune. remove duplicate values from all categories. Save dups for reporting:
-    dups: Dict[str, Dict[str, str]] = remove_duplicate_values(bookmarks)
-    # print a report of which duplicates in their categories were deleted:
-    if len(dups) > 0:
-        print("deleted duplicate key-values:")
-        for category in dups:
-            print(f"{category}:")
-            for key, path in dups[category].items():
-                print(f"  {key}: {path}")
-
-    option: str = 'w' if os.path.exists(BOOKMARKS_FILE) else 'x'
+    # prune. remove duplicate values from all categories, and report
+    # them. Not when compacting: the journal's changes were deduped
+    # as they were committed.
+    if not compacting:
+        report_duplicates(remove_duplicate_values(bookmarks))
+
+    # the file load_bookmarks() reads (config.json "bookmarks_file")
+    bookmarks_file: str = get_storage_file("json")
     try:
         # in case parent directories do not exist:
-        dirs = os.path.dirname(BOOKMARKS_FILE)
+        dirs = os.path.dirname(bookmarks_file)
         os.makedirs(dirs, exist_ok=True)
 
-        # read/write/create file to persist data:
-        with open(BOOKMARKS_FILE, option) as f:
-            json.dump(bookmarks, f, indent=4)
+        # the journals this write folds in (see `replay_journal()`)
+        journal_file: str = bookmarks_file + ".journal"
+        folded: list[str] = [journal_file + ".compacting"] if compacting else [journal_file, journal_file + ".compacting"]
+
+        def mark_snapshot(temp_file: str) -> None:
+            # the rename keeps the temp file's signature
+            record: Tuple[object, ...] = ("snapshot", *get_file_signature(temp_file))
+            for folded_file in folded:
+                if os.path.exists(folded_file) and not append_to_journal(record, journal_file=folded_file, durable=True):
+                    raise OSError(f"can't mark {folded_file} as folded in")
+
+        # replace the file in one step, so that readers never
+        # see it empty or half written:
+        with lock_bookmarks():
+            write_file_atomically(bookmarks_file, json.dumps(bookmarks, indent=4), durable=True, before_replace=mark_snapshot)
+            mark_bookmarks_file_sorted()
+            # for loads that only need some categories, and jumps
+            import pbj_index
+            pbj_index.build_index(bookmarks_file + ".index", bookmarks, get_file_signature(bookmarks_file))
+            if not compacting:
+                for folded_file in folded:
+                    if os.path.exists(folded_file):
+                        os.remove(folded_file)
     except Exception as e:
         # Prints error message, and {type(e)..} name/type of exception and {e} error
         print(f"Error saving to BOOKMARKS_FILE in save_to_bookmarks_file(). ({type(e).__name__}): {e}")
         return False
+    # with bookmark layers, the caches hold their merged view, which
+    # the callers write
+    if not compacting and not get_config_value("bookmark_layers"):
+        write_jump_cache(bookmarks)
+        write_completion_cache(bookmarks)
+    write_validation_stamp()
     return True
     
 def set_config_value(key: str = "default_category", value: str = "default") -> bool:
@@ -750,19 +1833,26 @@ def set_config_value(key: str = "default_category", value: str = "default") -> b
 
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                try:
-                    config = json.load(f)
-                except json.JSONDecodeError as je:
-                    print(f"json.JSONDecodeError in set_config_value(): \n{je}")
+            config = dict(load_config())
         except Exception as e:
             print(f"set_config_value() Exception handling... {CONFIG_FILE} \nexception type: {type(e).__name__}: \n{e}")
 
     if config and key in config: # write the new key-val to file
         config[key] = value
         try: 
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f, indent=4, sort_keys=True)
+            if key == "default_category" and config.get("storage") == "shards":
+                import pbj_shards # its manifest records the default category too
+                pbj_shards.set_default_category(get_storage_file(), value)
+            write_file_atomically(CONFIG_FILE, json.dumps(config, indent=4, sort_keys=True), durable=True)
+            # write through, so the next get_config_value() doesn't re-read:
+            config_cache["signature"] = get_file_signature(CONFIG_FILE)
+            config_cache["config"] = config
+            write_validation_stamp()
+            # e.g. the default category, whose keys `pbj <TAB>` offers.
+            # If no bookmarks were loaded, the completer finds the cache
+            # older than config.json and has it rewritten.
+            if bookmarks_state["bookmarks"] is not None:
+                write_completion_cache(bookmarks_state["bookmarks"])
         except Exception as e:
             print(f"set_config_value() Exception handling... {CONFIG_FILE} \nexception type: {type(e).__name__}: \n{e}")
         success = True
@@ -771,6 +1861,12 @@ def set_config_value(key: str = "default_category", value: str = "default") -> b
 
     return success
 
+def set_loaded_bookmarks(bookmarks: Dict[str, Dict[str, str]], signature: Tuple[Tuple[int, int, int], ...]) -> None:
+    """Records `bookmarks` as read from storage at `signature`. Its index is built on first use."""
+    bookmarks_state["bookmarks"] = bookmarks
+    bookmarks_state["signature"] = signature
+    bookmarks_state["index"] = None
+
 def set_current_category(bookmarks: Dict[str, Dict[str, str]], category: str = None, keynum: str = None)-> bool:
     success: bool = True
     old_current_category: str = get_current_category() 
@@ -803,44 +1899,172 @@ def set_current_category(bookmarks: Dict[str, Dict[str, str]], category: str = N
         else:
             success = False
 
-    # if cat and dir change successful, prepare to write
-    # current category env to temp file.  The bash script
-    # will set the env and change dir using the file contents
+    # if cat and dir change successful, hand them to the bash
+    # script, which sets PBJ_CURRENT_CATEGORY and changes dir
     if success:
-        parent_pid: int = os.getppid()
-        temp_dir: str = tempfile.gettempdir()
-        temp_filename: str = os.path.join(temp_dir, f"pbj_set_current_category_{parent_pid}.tmp")
-
-        # write to temp file:
-        try:
-            # bash script will source and rm temp file
-            with open(temp_filename, 'w') as f:
-                # bash script will export variable
-                f.write(f"PBJ_CURRENT_CATEGORY=\"{new_current_category}\"\n")
-                if new_current_directory:
-                    # bash script will cd to new dir if var exists
-                    f.write(f"PBJ_NEWDIR=\"{new_current_directory}\"\n")
-        except Exception as e:
+        if new_current_directory:
+            new_current_directory = os.path.expanduser(new_current_directory)
+        if not hand_to_shell(new_current_category, new_current_directory):
             success = False
-            print(f"set_current_category() Exception handling... {temp_filename}\nexception type: {type(e).__name__}: \n{e}")
+            print("the current category is kept by the pbj shell function: run `pbj -cu` after `source pbj`")
 
-    # set env var, PBJ_CURRENT_CATEGORY in bash script
     return success
 
-def sort_bookmarks(bookmarks: Dict[str, Dict[str, str]]) -> OrderedDict[str, OrderedDict[str, str]]:
-    sorted_dict: OrderedDict[str, Dict[str, str]] = OrderedDict()
+def shell_quote(text: str) -> str:
+    # like `shlex.quote()`, without importing shlex on the jump path
+    return "'" + text.replace("'", "'\\''") + "'"
+
+def sort_bookmarks(bookmarks: Dict[str, Dict[str, str]]) -> SortedDict:
+    # SortedDicts of SortedDicts (from `load_bookmarks()`) are always sorted
+    if isinstance(bookmarks, SortedDict) and all(isinstance(items, SortedDict) for items in bookmarks.values()):
+        return bookmarks
+    sorted_dict: SortedDict = SortedDict()
     for ordered_key in sorted(bookmarks.keys()):
-        ordered_inner_dict = OrderedDict(sorted(bookmarks[ordered_key].items()))
+        ordered_inner_dict = SortedDict(bookmarks[ordered_key].items())
         sorted_dict[ordered_key] = ordered_inner_dict
     return sorted_dict
         
     
+def validate_bookmarks(file_read: Dict[str, Dict[str, str]]) -> bool:
+    """
+    Returns `True` if `file_read`, the bookmarks as read from storage,
+    follows the naming rules for categories, keys and paths. Prints
+    the errors found otherwise.
+    """
+    success: bool = True
+
+    # check for user errors in file_read
+    # user error list:
+    errors_in_file_read: list[Tuple[str, str]] = []
+
+    if not file_read:
+        success = False
+    else:
+        for category, value in file_read.items():
+
+            cat_conditions: list[Tuple[bool, str]] = [
+                (not isinstance(category, str), "All categories must be double quoted. key-vals in config.json must be strings"),
+                (not category_is_valid(category), "Category name characters may only contain alphabet chars."),
+                (name_is_key(file_read, category), "Category names (outer-keys) must not be the same as key names (inner-keys)")
+            ]
+            for condition, message in cat_conditions:
+                if condition:
+                    success = False
+                    errors_in_file_read += [(category, message)]
+
+            for k, v in value.items():
+                key_conditions: list[Tuple[bool, str]] = [
+                    (not key_is_valid(k), "Keys may be alphanumeric; may have dots, but not leading/trailing dots."),
+                    (k in file_read, "keys (inner-keys) may not have same name as a category (outer-keys)."),
+                ]
+                val_conditions: list[Tuple[bool, str]] = [
+                    (not isinstance(v, str), "All keys and values in .json files must be double quoted unless surrounded by curly braces.")                   
+                ]
+                for condition, message in key_conditions: 
+                    if condition:
+                        success = False
+                        errors_in_file_read += [(k, message)]
+
+                for condition, message in val_conditions:
+                    if condition:
+                        success = False
+                        errors_in_file_read += [(v, message)]
+
+    if errors_in_file_read:
+        print(f"\nErrors found in bookmarks.json file ({CONFIG_FILE}):")
+        import textwrap
+        num: int = 0
+        for cat, msg in errors_in_file_read:
+            prefix: str = f"  {num + 1}) '{cat}: "
+            width: int = get_terminal_width()
+            wrapper = textwrap.TextWrapper(width, prefix, " " * len(prefix))
+            print(wrapper.fill(msg))
+            num += 1
+
+    return success
+
+def stat_directory(path: str, timeout: float = None) -> str:
+    """
+    Returns "ok" if `path` is a directory, "missing" if it is not (or
+    can't be stat'ed), or "unavailable" if its stat did not return
+    within `timeout` seconds (default: `get_path_timeout()`).
+
+    The one `os.stat()` runs in a thread of its own that is given up on
+    at the deadline. It is a bare `_thread` thread: `threading` costs
+    milliseconds to import, and nothing waits for the thread at exit.
+    """
+    import _thread
+    if timeout is None:
+        timeout = get_path_timeout()
+    result: list[str] = []
+    done = _thread.allocate_lock()
+    done.acquire()
+
+    def stat_in_thread() -> None:
+        try:
+            result.append("ok" if stat.S_ISDIR(os.stat(path).st_mode) else "missing")
+        except (OSError, ValueError):
+            result.append("missing")
+        done.release()
+
+    _thread.start_new_thread(stat_in_thread, ())
+    if not done.acquire(timeout=timeout):
+        return "unavailable"
+    return result[0]
+
+def store_changes(changes: list[Tuple[str, ...]]) -> bool:
+    """
+    Writes `changes` (see `commit_change()`) to the configured storage
+    backend, and re-stamps validation, as pbj wrote the change. The
+    caller holds the bookmarks lock.
+    """
+    storage: str = get_config_value("storage")
+    if storage == "sqlite":
+        import pbj_sqlite
+        if not pbj_sqlite.apply_changes(get_storage_file(), changes):
+            return False
+    elif storage == "shards":
+        import pbj_shards
+        if not pbj_shards.apply_changes(get_storage_file(), changes):
+            return False
+    elif not append_to_journal(*changes):
+        return False
+    write_validation_stamp()
+    return True
+
+def timeout_is_valid(value: str) -> bool:
+    try:
+        return 0 < float(value) < float("inf")
+    except (TypeError, ValueError):
+        return False
+
+def validation_is_current() -> bool:
+    """
+    Returns `True` if config.json, bookmarks.json and its journals have
+    the same (mtime, size, inode) as when they last passed
+    `initialize()`, i.e. validation can be skipped.
+    """
+    stamp: Dict[str, list[int]] = read_validation_stamp()
+    conditions: Tuple[bool, ...] = (
+        stamp.get("config") == list(get_file_signature(CONFIG_FILE)),
+        stamp.get("bookmarks") == list(get_file_signature(get_storage_file())),
+        stamp.get("journal") == [list(signature) for signature in get_journal_signature()],
+        # config.json predates a key added to DEFAULT_CONFIG:
+        all(key in load_config() for key in DEFAULT_CONFIG),
+    )
+    current: bool = False not in conditions
+    validation_state["validated"] = current
+    return current
+
 def value_found_in_bookmarks(bookmarks: Dict[str, Dict[str, str]], value: str) -> bool:
-    return any(value in inner_dict.values() for inner_dict in bookmarks.values())
+    return value in get_bookmarks_index(bookmarks)["path_entries"]
+
+def value_found_in_category(bookmarks: Dict[str, Dict[str, str]], category: str, value: str) -> bool:
+    return value in get_bookmarks_index(bookmarks)["category_paths"].get(category, {})
 
 def value_found_in_dict(reference: Dict[str,str], value: str) -> bool:
-    reference_set: set[str] = set(reference.values())
-    return value in reference_set
+    # unindexed; prefer value_found_in_category() for categories of bookmarks
+    return value in reference.values()
 
 def value_is_valid(value: str) -> bool:
     """Returns `True` if value arg is a path to an existing directory
@@ -855,14 +2079,145 @@ def value_is_valid(value: str) -> bool:
     Returns:
         bool: > `True` if value is a path to a directory which is not already saved to another key.
     """
-    # conditions tuple:
-    conditions: Tuple[bool,...] = (
-        os.path.isdir(value),
-        os.path.exists(value),
-    )
-    return False not in conditions
+    return stat_directory(value) == "ok"
 
+def write_file_atomically(path: str, text: str | bytes, durable: bool = False, before_replace: Callable[[str], None] = None) -> None:
+    """
+    Writes `text` (or bytes) to a temp file in the same directory and
+    renames it over `path`, so readers see either the old or the new file,
+    never a truncated one. With `durable`, the data is fsync'ed
+    before the rename. Keeps the permissions of an existing `path`.
+    `before_replace`, if given, is called with the finished temp file's
+    name right before the rename.
+    Raises `OSError` on failure, leaving `path` untouched.
+    """
+    import tempfile
+    directory, name = os.path.split(path)
+    fd, temp_filename = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(text, bytes) else 'w') as f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(temp_filename, os.stat(path).st_mode & 0o777)
+        if before_replace is not None:
+            before_replace(temp_filename)
+        os.replace(temp_filename, path)
+    except OSError:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+def write_shell_commands() -> None:
+    """
+    Writes the commands queued by `hand_to_shell()` to the wrapper's
+    fd, fenced by SHELL_BLOCK_BEGIN and SHELL_BLOCK_END. The wrapper
+    `eval`s the block only if it arrived whole.
+    """
+    if shell_state["fd"] is None or not shell_state["commands"]:
+        return
+    block: str = "\n".join([SHELL_BLOCK_BEGIN, *shell_state["commands"], SHELL_BLOCK_END]) + "\n"
+    try:
+        with open(shell_state["fd"], 'w', closefd=False) as f:
+            f.write(block)
+    except OSError as e:
+        print(f"write_shell_commands(): {type(e).__name__}: {e}")
+    shell_state["commands"] = []
 
+def write_validation_stamp(force: bool = False) -> None:
+    """
+    Records the current signatures of config.json, bookmarks.json and
+    its journals in `VALIDATION_STAMP_FILE`. Without `force`, only does so if the
+    files were validated in this process (see `validation_state`).
+    """
+    if not (force or validation_state["validated"]):
+        return
+    validation_state["validated"] = True
+    stamp: Dict[str, list[int]] = dict(read_validation_stamp())
+    stamp["config"] = list(get_file_signature(CONFIG_FILE))
+    stamp["bookmarks"] = list(get_file_signature(get_storage_file()))
+    stamp["journal"] = [list(signature) for signature in get_journal_signature()]
+    try:
+        write_file_atomically(VALIDATION_STAMP_FILE, json.dumps(stamp))
+    except OSError:
+        pass # no stamp just means full validation next time
+
+def write_jump_cache(bookmarks: Dict[str, Dict[str, str]]) -> bool:
+    """
+    Writes `JUMP_CACHE_FILE`, a bash script the pbj wrapper sources
+    to resolve `pbj key|num` and `pbj category key|num` without
+    starting Python. It holds two associative arrays keyed by
+    "category:key" and "category:num" (speed-dial number), plus the
+    default category and the files the cache was generated from
+    (bookmark layers included).
+
+    `bookmarks` must already be sorted, so that the numbers match
+    those printed by `ls_category()`.
+    """
+    import shlex
+    import time
+
+    lines: list[str] = [
+        # the wrapper re-sources the cache only when this line changes:
+        f"# pbj jump cache {time.time_ns()}: generated by pbj.py, do not edit",
+        f"PBJ_CACHE_BOOKMARKS_FILE={shlex.quote(get_storage_file())}",
+        f"PBJ_CACHE_CONFIG_FILE={shlex.quote(CONFIG_FILE)}",
+        f"PBJ_CACHE_LAYER_FILES=({' '.join(shlex.quote(path) for path in get_layer_files())})",
+        f"PBJ_CACHE_DEFAULT={shlex.quote(get_config_value())}",
+        "declare -gA PBJ_CACHE_KEYS=(",
+    ]
+    for category, items in bookmarks.items():
+        for key, path in items.items():
+            lines.append(f"  [{shlex.quote(f'{category}:{key}')}]={shlex.quote(path)}")
+    lines.append(")")
+    lines.append("declare -gA PBJ_CACHE_NUMS=(")
+    for category, items in bookmarks.items():
+        for i, path in enumerate(items.values()):
+            lines.append(f"  [{shlex.quote(f'{category}:{i + 1}')}]={shlex.quote(path)}")
+    lines.append(")")
+
+    # the wrapper never sources a half-written file:
+    try:
+        write_file_atomically(JUMP_CACHE_FILE, "\n".join(lines) + "\n")
+    except OSError as e:
+        print(f"write_jump_cache() Exception handling... {JUMP_CACHE_FILE}\nexception type: {type(e).__name__}: \n{e}")
+        return False
+    return True
+
+def write_completion_cache(bookmarks: Dict[str, Dict[str, str]]) -> bool:
+    """
+    Writes `COMPLETION_CACHE_FILE`, a bash script the wrapper's tab
+    completer sources: the category names, and the keys of each
+    category as one space separated string, ready for `compgen -W`.
+    Completing then costs no process, whatever the number of
+    bookmarks. Category and key names hold no characters that need
+    quoting in a word list (see `pbj -h standards`).
+    """
+    import shlex
+    import time
+
+    lines: list[str] = [
+        # the completer re-sources the cache only when this line changes:
+        f"# pbj completion cache {time.time_ns()}: generated by pbj.py, do not edit",
+        f"PBJ_COMPLETE_BOOKMARKS_FILE={shlex.quote(get_storage_file())}",
+        f"PBJ_COMPLETE_CONFIG_FILE={shlex.quote(CONFIG_FILE)}",
+        f"PBJ_COMPLETE_LAYER_FILES=({' '.join(shlex.quote(path) for path in get_layer_files())})",
+        f"PBJ_COMPLETE_DEFAULT={shlex.quote(get_config_value())}",
+        f"PBJ_COMPLETE_CATEGORIES={shlex.quote(' '.join(bookmarks))}",
+        "declare -gA PBJ_COMPLETE_KEYS=(",
+    ]
+    for category, items in bookmarks.items():
+        lines.append(f"  [{shlex.quote(category)}]={shlex.quote(' '.join(items))}")
+    lines.append(")")
+
+    try:
+        write_file_atomically(COMPLETION_CACHE_FILE, "\n".join(lines) + "\n")
+    except OSError as e:
+        print(f"write_completion_cache(): {type(e).__name__}: {e}")
+        return False
+    return True
 
     
     
@@ -870,15 +2225,14 @@ def value_is_valid(value: str) -> bool:
     
     
     
-if __name__ == "__main__":
-    # verify config.json & bookmarks.json. Validate all
-    # .json data. Create starter files if they dont exist.
-    # verify that default_category matches a category in 
-    # bookmarks.json. Bash script (pbj-liason) depends on success.
-    if not initialize():
-        sys.exit(1)
-    bookmarks: Dict[str, Dict[str, str]] = load_bookmarks()
-    num_args: int = len(sys.argv)
+def dispatch(bookmarks: Dict[str, Dict[str, str]], argv: list[str]) -> None:
+    """
+    Runs the command given by `argv` (laid out like `sys.argv`)
+    against an already loaded and validated `bookmarks`.
+    Used by `__main__`, and by `pbj_daemon` to answer requests
+    without starting a new interpreter.
+    """
+    num_args: int = len(argv)
     default_category: str = get_config_value()
     current_category: str = get_current_category()
 
@@ -894,8 +2248,19 @@ if __name__ == "__main__":
     opt_rc: bool = False
     is_test: bool = False
     long_opt_set_term_width: bool = False
-    if len(sys.argv) >= 2:
-        arg: str = sys.argv[1]
+    long_opt_daemon: bool = False
+    long_opt_check: bool = False
+    long_opt_prune: bool = False
+    long_opt_migrate: bool = False
+    long_opt_top: bool = False
+    long_opt_import: bool = False
+    long_opt_tsv: bool = False
+    long_opt_jsonl: bool = False
+    long_opt_refresh: bool = False
+    long_opt_dedupe: bool = False
+    long_opt_batch: bool = False
+    if len(argv) >= 2:
+        arg: str = argv[1]
         no_dash = not arg.startswith('-')
         opt_h = arg == "-h" or arg == "--help"
         opt_a = arg == "-a"   # list all categories and keys
@@ -906,6 +2271,17 @@ if __name__ == "__main__":
         opt_r = arg == "-r"   # remove key
         opt_rc = arg == "-rc" # remove category
         is_test = arg == "-test"  # tests for noob devs
+        long_opt_daemon = arg == "--daemon" # serve requests over a unix socket
+        long_opt_check = arg == "--check"   # full validation (done before dispatch), and path health check
+        long_opt_prune = arg == "--prune"   # path health check, removing bookmarks of missing directories
+        long_opt_migrate = arg == "--migrate" # move bookmarks to another storage backend
+        long_opt_top = arg == "--top"         # list fuzzy matches with their scores
+        long_opt_import = arg == "--import"   # bulk save from zoxide, autojump, history or a path list
+        long_opt_tsv = arg == "--tsv"         # list unwrapped, tab separated
+        long_opt_jsonl = arg == "--jsonl"     # list unwrapped, as JSON lines
+        long_opt_refresh = arg == "--refresh" # rewrite the jump and completion caches
+        long_opt_dedupe = arg == "--dedupe"   # remove and report duplicate paths within categories
+        long_opt_batch = arg == "--batch"     # apply scripted commands, committed together
         
     # help options
     if num_args > 1 and opt_h:
@@ -915,7 +2291,7 @@ if __name__ == "__main__":
             pbj_help.help_name()
             pbj_help.help_synopsis()
         elif num_args > 2:
-            help_option: str = sys.argv[2].lower()
+            help_option: str = argv[2].lower()
             if help_option == "all":
                 pbj_help.help()
             elif help_option == "synopsis":
@@ -950,7 +2326,7 @@ if __name__ == "__main__":
     elif num_args > 2 and opt_s or opt_c: 
         # if 3 args: ex: ./pbj -s [alphanum (key)] (save to default)
         if num_args == 3: 
-            key: str = sys.argv[2]
+            key: str = argv[2]
             if key in bookmarks[current_category]:
                 if opt_s:
                     print(f"key ({key}) already assigned to '{bookmarks[current_category][key]}'.")
@@ -965,8 +2341,8 @@ if __name__ == "__main__":
                 save_to_category(bookmarks, current_category, key)
         # elif 4 args: ex: ./pbj -s|-c [category] [key] (save to specified cat. or newly created cat)
         elif num_args == 4: 
-            category: str = sys.argv[2]
-            key: str = sys.argv[3]
+            category: str = argv[2]
+            key: str = argv[3]
             if category in bookmarks:
                 if key in bookmarks[category]:
                     if opt_s:
@@ -995,37 +2371,37 @@ if __name__ == "__main__":
         if num_args == 2:
             change_default_category(bookmarks)
         elif num_args == 3:
-            category: str = sys.argv[2]
+            category: str = argv[2]
             change_default_category(bookmarks, category)
     # if arg[1] is -r: (remove path) WORKING...
     elif num_args > 2 and opt_r:
         # if 3 args: ex ./pbj -r [alphanum key]
         if num_args == 3: # remove keypair from current_category
-            key: str = sys.argv[2]
+            key: str = argv[2]
             path: str = ""
             if key in bookmarks[current_category]:
                 path = bookmarks[current_category][key]
             if delete_key(bookmarks, current_category, key):
                 print(f"keypair deleted from '{current_category}':")
                 print(f"{key}: {path}")
-            else:
+            elif not path: # else the commit said why it failed, e.g. a read-only layer
                 print("key does not exist.")
         
         # elif 4 args: ex ./pbj -r [category-key] [nested-key]:
         elif num_args == 4: # remove keypair from specified category
-            category: str = sys.argv[2]
-            key: str = sys.argv[3]
+            category: str = argv[2]
+            key: str = argv[3]
             path: str = ""
             if category in bookmarks and key in bookmarks[category]:
                 path = bookmarks[category][key]
             if delete_key(bookmarks, category, key):
                 print(f"keypair deleted from '{category}':")
                 print(f"{key}: {path}")
-            else:
+            elif not path: # else the commit said why it failed
                 print("key or category does not exist")
     # ./pbj -rc [category]
     elif num_args > 2 and opt_rc:
-        category: str = sys.argv[2]
+        category: str = argv[2]
         accept: bool = False
         found: bool = False
         # confirm with user if category exists
@@ -1039,7 +2415,8 @@ if __name__ == "__main__":
         # remove category from bookmarks:
         if accept and delete_category(bookmarks, category):
             print(f"'{category}' category was deleted.")
-        elif found:
+        # a failed commit (e.g. a read-only layer) has said why
+        elif found and (not accept or category == get_config_value()):
             print("deletion aborted/unsuccessful")
             print("note: current category cannot be deleted.")
 
@@ -1051,39 +2428,103 @@ if __name__ == "__main__":
             
         if num_args == 3:
             # specify new current category
-            new_category: str = sys.argv[2]
+            new_category: str = argv[2]
             set_current_category(bookmarks, new_category)
 
         if num_args == 4:
             # speciry new current category and key to cd to.
-            new_category: str = sys.argv[2]
-            keynum: str = sys.argv[3]
+            new_category: str = argv[2]
+            keynum: str = argv[3]
             set_current_category(bookmarks, new_category, keynum)
 
 ########-cu#######################################
 
+    # report result of full validation, and check bookmarked paths: ./pbj --check [category]
+    # or check and remove bookmarks of missing directories: ./pbj --prune [category]
+    elif num_args in (2, 3) and (long_opt_check or long_opt_prune):
+        if long_opt_check:
+            print(f"config.json and bookmarks.json are valid.")
+        if num_args == 3 and argv[2] not in bookmarks:
+            print("category not found")
+        else:
+            import pbj_check
+            categories: list[str] = [argv[2]] if num_args == 3 else list(bookmarks)
+            pbj_check.check_bookmarks(bookmarks, categories, prune=long_opt_prune)
+
+    # full duplicate sweep: ./pbj --dedupe [category]
+    elif num_args in (2, 3) and long_opt_dedupe:
+        if num_args == 3 and argv[2] not in bookmarks:
+            print("category not found")
+        elif not dedupe_bookmarks(bookmarks, argv[2:] or None):
+            print("no duplicates found")
+
+    # scripted changes, one write: ./pbj --batch [file|-] [--dry-run]
+    elif long_opt_batch and len([arg for arg in argv[2:] if arg != "--dry-run"]) <= 1:
+        import pbj_batch
+        source: str = next((arg for arg in argv[2:] if arg != "--dry-run"), "-")
+        pbj_batch.run_batch(bookmarks, source, dry_run="--dry-run" in argv[2:])
+
+    # change storage backend: ./pbj --migrate [json|sqlite|shards]
+    elif num_args == 3 and long_opt_migrate:
+        migrate_storage(bookmarks, argv[2])
+
+    # list best fuzzy matches: ./pbj --top [fragment] [n]
+    elif num_args in (3, 4) and long_opt_top:
+        import pbj_fuzzy
+        limit: int = int(argv[3]) if num_args == 4 and argv[3].isdecimal() else 10
+        pbj_fuzzy.print_top(bookmarks, argv[2], limit)
+
+    # machine-readable listing: ./pbj --tsv|--jsonl [category]
+    elif num_args in (2, 3) and (long_opt_tsv or long_opt_jsonl):
+        fmt: str = "tsv" if long_opt_tsv else "jsonl"
+        if num_args == 2:
+            ls_all(bookmarks, fmt)
+        elif argv[2] in bookmarks:
+            ls_category(bookmarks, argv[2], fmt)
+        else:
+            print("category not found")
+
+    # bulk import: ./pbj --import [zoxide|autojump|history|file|-] [category]
+    elif num_args in (3, 4) and long_opt_import:
+        import pbj_import
+        category: str = argv[3] if num_args == 4 else current_category
+        pbj_import.import_bookmarks(bookmarks, argv[2], category)
+
+    # rewrite the caches the wrapper sources: ./pbj --refresh
+    # (the completer runs it when its cache is stale)
+    elif num_args == 2 and long_opt_refresh:
+        write_jump_cache(bookmarks)
+        write_completion_cache(bookmarks)
+
+    # run resident daemon: ./pbj --daemon
+    elif num_args == 2 and long_opt_daemon:
+        import pbj_daemon
+        pbj_daemon.serve(bookmarks)
+
     elif no_dash:
         # if no args:
         if num_args == 1:
             ls_category(bookmarks, current_category)
         # elif 1 args: ex: ./pbj
         elif num_args == 2: #change directory current_category: ./pbj [key | num]
-            arg1: str = sys.argv[1]
+            arg1: str = argv[1]
             # check if arg1 is category:
             if arg1 in bookmarks:
                 ls_category(bookmarks, arg1)
             # change directory to the key of arg[1]
             else: 
+                start_dir: str = os.getcwd()
                 dir: str = change_directory(bookmarks, current_category, arg1)
-                print(os.path.abspath(dir))
+                report_jump(start_dir, os.path.abspath(dir))
             # print(os.getcwd())
         # elif 3 args: ex ./pbj [category] [alphanum | number]
         elif num_args == 3:
-            category = sys.argv[1]
-            keynum = sys.argv[2]
-            # if category does not exist, current working directory returned.
-            dir: str = change_directory(bookmarks, category, keynum)
-            print(os.path.abspath(dir))
+            category = argv[1]
+            keynum = argv[2]
+            # if nothing matches, current working directory returned.
+            start_dir: str = os.getcwd()
+            dir: str = change_directory(bookmarks, category, keynum, category)
+            report_jump(start_dir, os.path.abspath(dir))
     else:
         import pbj_help
         pbj_help.help_synopsis()
@@ -1091,4 +2532,37 @@ if __name__ == "__main__":
     # this will create a new subshell in the client terminal
     # for example, to exit the terminal you'll have to ctr-d 
     # multiple times. Instead, use bash wrapper.
-                
+
+def main() -> None:
+    """
+    Runs the command in `sys.argv`. The pbj wrapper calls this after
+    `import pbj` (see `_pbj_python` in pbj), so that pbj.py runs from
+    its cached bytecode instead of being compiled on every call, as
+    it is when run as a script.
+    """
+    # the wrapper's fd for cd and current category changes, see
+    # `hand_to_shell()`. Not for child processes (`pbj --daemon`).
+    shell_fd: str = os.environ.pop("PBJ_SHELL_FD", "")
+    if shell_fd.isdecimal():
+        shell_state["fd"] = int(shell_fd)
+
+    # opt-in per-phase timing and I/O counters, see pbj_profile
+    if os.environ.get("PBJ_PROFILE"):
+        import pbj_profile
+        pbj_profile.install(globals())
+
+    # a full validation is asked for with `--check`
+    opt_check: bool = len(sys.argv) >= 2 and sys.argv[1] == "--check"
+    bookmarks: Dict[str, Dict[str, str]] = load_checked_bookmarks(force=opt_check)
+    if bookmarks is None:
+        sys.exit(1)
+    dispatch(bookmarks, sys.argv)
+    write_shell_commands()
+    # whichever jumps left it there, the wrapper's included
+    fold_visits_if_large()
+
+if __name__ == "__main__":
+    # sibling modules `import pbj`: have them share this module (its
+    # lock and caches) instead of loading a second copy.
+    sys.modules.setdefault("pbj", sys.modules[__name__])
+    main()
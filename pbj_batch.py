@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+import contextlib
+import io
+import json
+import os
+import shlex
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+import pbj
+
+# `pbj --batch [file|-] [--dry-run]`: one command per line, words split
+# like a shell's (quote paths with spaces), "#" starts a comment:
+#
+#   save CATEGORY KEY [PATH]     new bookmark (PATH defaults to the cwd),
+#                                creating CATEGORY if needed
+#   change CATEGORY KEY [PATH]   new path for an existing bookmark
+#   remove CATEGORY [KEY]        a bookmark, or the whole category
+#   rename CATEGORY OLD NEW      a key
+#   rename OLD NEW               a category
+#   set-default CATEGORY         the default category
+#
+# Each command is checked against the bookmarks as left by the ones
+# before it, with the validators of the interactive commands, and
+# printed back as a JSON line: {"line", "command", "ok"} plus "error"
+# or the resulting "change". The changes are committed together at the
+# end, only if every command succeeded, and the default category is set
+# after them. A last line sums up: {"done", "committed", "dry_run", ...},
+# plus a "message" holding what the commit reported (duplicates removed,
+# changes refused by bookmark layers), so that stdout stays JSON lines.
+USAGE: Dict[str, str] = {
+    "save": "save CATEGORY KEY [PATH]",
+    "change": "change CATEGORY KEY [PATH]",
+    "remove": "remove CATEGORY [KEY]",
+    "rename": "rename CATEGORY OLD NEW | rename OLD NEW",
+    "set-default": "set-default CATEGORY",
+}
+
+def check_category_name(bookmarks: Dict[str, Dict[str, str]], category: str) -> str:
+    """Returns why `category` can't name a new category, or "" if it can."""
+    if not pbj.category_is_valid(category):
+        return f"invalid category name '{category}' (see `pbj -h standards`)"
+    if pbj.name_is_key(bookmarks, category):
+        return f"'{category}' is a key in another category"
+    return ""
+
+def check_path(bookmarks: Dict[str, Dict[str, str]], category: str, path: str) -> str:
+    """Returns why `path` can't be saved to `category`, or "" if it can."""
+    if not pbj.value_is_valid(path):
+        return f"'{path}' is not an existing directory"
+    if category in bookmarks and pbj.value_found_in_category(bookmarks, category, path):
+        return f"'{path}' is already saved in '{category}'"
+    return ""
+
+def parse_command(bookmarks: Dict[str, Dict[str, str]], words: List[str], default: str) -> Tuple[str, Tuple[str, ...], str]:
+    """
+    Returns (error, change, default category) for the command `words`,
+    checked against `bookmarks` and the default category `default`:
+    the change to apply (`None` for set-default), or an error message
+    and `None`.
+    """
+    name, args = words[0], words[1:]
+    if name not in USAGE:
+        return f"unknown command '{name}'", None, default
+
+    if name in ("save", "change") and len(args) in (2, 3):
+        category, key = args[:2]
+        path: str = os.path.abspath(os.path.expanduser(args[2] if len(args) == 3 else os.getcwd()))
+        exists: bool = key in bookmarks.get(category, {})
+        if name == "save" and exists:
+            return f"'{key}' is already saved in '{category}', use change", None, default
+        if name == "change" and not exists:
+            return f"'{key}' not found in '{category}'", None, default
+        if category not in bookmarks:
+            error: str = check_category_name(bookmarks, category)
+            if error:
+                return error, None, default
+        if not pbj.key_is_valid(key):
+            return f"invalid key '{key}' (see `pbj -h standards`)", None, default
+        if key in bookmarks or key == category:
+            return f"'{key}' is a category name", None, default
+        error = check_path(bookmarks, category, path)
+        if error:
+            return error, None, default
+        return "", ("save", category, key, path), default
+
+    if name == "remove" and len(args) == 1:
+        category: str = args[0]
+        if category not in bookmarks:
+            return f"category '{category}' not found", None, default
+        if category == default:
+            return "the default category can't be removed", None, default
+        return "", ("delete_category", category), default
+
+    if name == "remove" and len(args) == 2:
+        category, key = args
+        if key not in bookmarks.get(category, {}):
+            return f"'{key}' not found in '{category}'", None, default
+        return "", ("delete_key", category, key), default
+
+    if name == "rename" and len(args) == 3:
+        category, old_key, new_key = args
+        if old_key not in bookmarks.get(category, {}):
+            return f"'{old_key}' not found in '{category}'", None, default
+        if not pbj.key_is_valid(new_key):
+            return f"invalid key '{new_key}' (see `pbj -h standards`)", None, default
+        if new_key in bookmarks:
+            return f"'{new_key}' is a category name", None, default
+        if new_key in bookmarks[category]:
+            return f"'{new_key}' is already saved in '{category}'", None, default
+        return "", ("rename_key", category, old_key, new_key), default
+
+    if name == "rename" and len(args) == 2:
+        old_category, new_category = args
+        if old_category not in bookmarks:
+            return f"category '{old_category}' not found", None, default
+        if new_category in bookmarks:
+            return f"category '{new_category}' already exists", None, default
+        error = check_category_name(bookmarks, new_category)
+        if error:
+            return error, None, default
+        # the default category follows its rename, as with `pbj -c`
+        return "", ("rename_category", old_category, new_category), new_category if old_category == default else default
+
+    if name == "set-default" and len(args) == 1:
+        if args[0] not in bookmarks:
+            return f"category '{args[0]}' not found", None, default
+        return "", None, args[0]
+
+    return f"usage: {USAGE[name]}", None, default
+
+def print_result(result: Dict[str, object]) -> None:
+    print(json.dumps(result), flush=True)
+
+def read_commands(source: str) -> Iterator[Tuple[int, str]]:
+    """Yields (line number, line) of the commands in `source` ("-" for stdin)."""
+    if source == "-":
+        yield from enumerate(sys.stdin, 1)
+        return
+    with open(os.path.expanduser(source), 'r', errors="replace") as f:
+        yield from enumerate(f, 1)
+
+def run_batch(bookmarks: Dict[str, Dict[str, str]], source: str, dry_run: bool = False) -> bool:
+    """
+    Applies the commands read from `source` to `bookmarks` in memory,
+    printing a JSON line per command, then commits all of their
+    changes with a single `pbj.commit_changes()`, unless a command
+    failed or `dry_run`. Returns True if every command succeeded (and,
+    unless `dry_run`, was committed).
+    """
+    old_default: str = pbj.get_config_value()
+    default: str = old_default
+    changes: List[Tuple[str, ...]] = []
+    failed: int = 0
+    commands: int = 0
+    # bookmark layers: the user's layer, as the commands leave it (see
+    # `pbj_layers.check_changes()`)
+    layers_scratch: Dict[str, object] = None
+    if pbj.get_config_value("bookmark_layers"):
+        import pbj_layers
+        layers_scratch = {"user": pbj.SortedDict(), "copied": set()}
+    try:
+        for number, line in read_commands(source):
+            try:
+                words: List[str] = shlex.split(line, comments=True)
+            except ValueError as e: # unbalanced quotes
+                words, error, change = [line.strip()], str(e), None
+            else:
+                if not words:
+                    continue
+                error, change, default = parse_command(bookmarks, words, default)
+                if change and layers_scratch is not None:
+                    error = pbj_layers.check_changes([change], layers_scratch)[0]
+            commands += 1
+            result: Dict[str, object] = {"line": number, "command": words, "ok": not error}
+            if error:
+                failed += 1
+                result["error"] = error
+            elif change:
+                pbj.apply_change(bookmarks, change)
+                changes.append(change)
+                result["change"] = list(change)
+            print_result(result)
+    except OSError as e: # `source` can't be read
+        failed += 1
+        print_result({"line": 0, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    committed: bool = False
+    output: io.StringIO = io.StringIO()
+    if not failed and not dry_run:
+        with contextlib.redirect_stdout(output):
+            committed = not changes or pbj.commit_changes(bookmarks, changes)
+            # after the changes, which may have created or renamed it
+            if committed and default != old_default:
+                committed = pbj.set_config_value(value=default)
+    summary: Dict[str, object] = {
+        "done": True,
+        "commands": commands,
+        "failed": failed,
+        "changes": len(changes),
+        "committed": committed,
+        "dry_run": dry_run,
+    }
+    if output.getvalue().strip():
+        summary["message"] = output.getvalue().strip()
+    print_result(summary)
+    return committed or (dry_run and not failed)
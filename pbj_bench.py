@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for pbj.py's core operations on synthetic bookmark sets.
+
+    python3 pbj_bench.py run [--sizes 10,1000,100000] [--output FILE]
+    python3 pbj_bench.py compare BEFORE.json AFTER.json
+    python3 pbj_bench.py startup [--budget MS]
+    python3 pbj_bench.py jump [--sizes 1000,10000,100000]
+    python3 pbj_bench.py profile
+    python3 pbj_bench.py hung [--timeout S]
+    python3 pbj_bench.py import
+
+`run` builds each bookmark set in a temporary HOME (the real
+~/.config/pbj is never touched), times every operation, and writes
+the results as JSON. `compare` prints the change per operation.
+`startup` measures the imports of a jump the way the pbj wrapper
+runs it, with `python3 -X importtime`, and exits with status 1 if
+they take longer than the budget or import a module the jump path
+should not need. `jump` times loading bookmarks and jumping, as
+pbj.py does after startup, on sets of growing size, with the binary
+index and with the whole file parsed. `profile` runs a jump, a
+listing and a save under PBJ_PROFILE, and exits with status 1 if a
+phase reports a negative counter. `hung` jumps to a bookmark whose
+`os.stat()` never returns, as on a hung mount, and exits with status 1
+unless pbj gives up on it within the "path_timeout" of config.json.
+`import` imports directories into a new category named like one of
+them, and exits with status 1 if the result doesn't pass validation.
+"""
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+# pbj reads HOME when imported. Point it at a scratch directory first,
+# removed on exit however the module was used (not by forked children,
+# such as a background compaction: they don't own it).
+BENCH_HOME: str = tempfile.mkdtemp(prefix="pbj_bench_")
+BENCH_PID: int = os.getpid()
+
+def remove_bench_home() -> None:
+    if os.getpid() == BENCH_PID:
+        shutil.rmtree(BENCH_HOME, ignore_errors=True)
+
+atexit.register(remove_bench_home)
+os.environ["HOME"] = BENCH_HOME
+os.environ["PBJ_TERM_WIDTH"] = "80"
+for variable in ("PBJ_JUMP_CACHE", "PBJ_VISITS_FILE", "PBJ_SOCKET", "PBJ_CURRENT_CATEGORY"):
+    os.environ.pop(variable, None)
+import pbj
+
+DEFAULT_SIZES: Tuple[int, ...] = (10, 1000, 100000)
+# each operation is repeated until it has run this long (or MAX_REPEATS times)
+MIN_SECONDS: float = 0.5
+MIN_REPEATS: int = 3
+MAX_REPEATS: int = 1000
+# `compare` marks changes smaller than this as noise
+NOISE: float = 0.05
+
+# `startup`: median milliseconds the jump path may spend importing pbj
+# and what it imports, and modules it must not import at all (each
+# belongs to commands other than a jump, and costs milliseconds).
+STARTUP_BUDGET_MS: float = 30.0
+STARTUP_REPEATS: int = 20
+STARTUP_EXCLUDED_MODULES: Tuple[str, ...] = (
+    "typing", "tempfile", "textwrap", "shlex", "sqlite3", "pbj_fuzzy", "pbj_help", "pbj_sqlite", "pbj_shards",
+)
+# `jump`: total bookmark counts, and the size of each category in them
+JUMP_SIZES: Tuple[int, ...] = (1000, 10000, 100000)
+JUMP_CATEGORY_SIZE: int = 100
+# `profile`: the commands run under PBJ_PROFILE, with "{category}" for
+# the set's first category
+PROFILE_COMMANDS: Tuple[Tuple[str, ...], ...] = (
+    ("{category}", "pbj.bookmarks"),
+    ("-a",),
+    ("-s", "profiled"),
+)
+# how the pbj wrapper runs pbj.py (see `_pbj_python` in pbj)
+LAUNCHER: str = "import sys; sys.path[0] = sys.argv.pop(1); import pbj; pbj.main()"
+# `hung`: the "path_timeout" the jump runs with, and how much longer than
+# that the whole process (interpreter start included) may take
+HUNG_TIMEOUT: float = 0.5
+HUNG_MARGIN: float = 1.0
+# runs pbj.py as LAUNCHER does, with `os.stat()` of the path in
+# argv[1] blocking for good
+HUNG_LAUNCHER: str = (
+    "import os, sys, time; hung = sys.argv.pop(1); real_stat = os.stat; "
+    "os.stat = lambda path, *args, **kwargs: time.sleep(3600) if path == hung else real_stat(path, *args, **kwargs); "
+    + LAUNCHER
+)
+
+def category_counts(size: int) -> Tuple[int, ...]:
+    # one big category, and the same entries spread over ~sqrt(size)
+    spread: int = max(1, int(size ** 0.5))
+    return (1, spread) if spread > 1 else (1,)
+
+def compare(before_file: str, after_file: str) -> None:
+    with open(before_file, 'r') as f:
+        before: Dict[str, Dict[str, float]] = json.load(f)["results"]
+    with open(after_file, 'r') as f:
+        after: Dict[str, Dict[str, float]] = json.load(f)["results"]
+
+    name_width: int = max((len(name) for name in before.keys() | after.keys()), default=10)
+    print(f"{'operation':<{name_width}}  {'before':>10}  {'after':>10}  change")
+    for name in sorted(before.keys() | after.keys(), key=sort_key):
+        if name not in before or name not in after:
+            side: str = "before" if name in before else "after"
+            print(f"{name:<{name_width}}  only in {side}")
+            continue
+        old: float = before[name]["median_s"]
+        new: float = after[name]["median_s"]
+        change: float = (new - old) / old if old else 0.0
+        note: str = "" if abs(change) < NOISE else (" slower" if change > 0 else " faster")
+        print(f"{name:<{name_width}}  {format_seconds(old):>10}  {format_seconds(new):>10}  {change:+7.1%}{note}")
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    elif seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+def make_bookmarks(size: int, categories: int) -> Dict[str, Dict[str, str]]:
+    """
+    Returns `size` bookmarks spread over `categories` categories, in
+    reverse order (like a hand-edited file) so that sorting has work
+    to do. Paths need not exist; one in a hundred repeats another
+    path of its category, for `remove_duplicate_values()`.
+    """
+    bookmarks: Dict[str, Dict[str, str]] = {}
+    names: List[str] = [category_name(i) for i in range(categories)]
+    for i in reversed(range(size)):
+        category: str = names[i % categories]
+        path: str = f"/srv/bench/{category}/project{i // 100}/dir{i}"
+        if i % 100 == 99:
+            path = f"/srv/bench/{category}/project{i // 100}/dir{i - 1}"
+        bookmarks.setdefault(category, {})[f"key{i}"] = path
+    return bookmarks
+
+def category_name(i: int) -> str:
+    # categories are alphabetic only
+    letters: str = ""
+    i += 26 * 26 # at least three letters
+    while i:
+        i, digit = divmod(i, 26)
+        letters = chr(ord("a") + digit) + letters
+    return "cat" + letters
+
+def profile() -> bool:
+    """
+    Runs each of PROFILE_COMMANDS in a fresh interpreter, as the pbj
+    wrapper does, with PBJ_PROFILE logging to a file, and checks that
+    no phase (nor the total) of any run counts a negative number of
+    opens, stats or bytes. Returns True if none does.
+    """
+    bookmarks: Dict[str, Dict[str, str]] = write_set(1000, 1)
+    category: str = next(iter(bookmarks))
+    pbj_dir: str = os.path.dirname(os.path.abspath(pbj.__file__))
+    log_file: str = os.path.join(BENCH_HOME, "profile.jsonl")
+    environment: Dict[str, str] = dict(os.environ, PBJ_PROFILE=log_file)
+    for arguments in PROFILE_COMMANDS:
+        command: List[str] = [sys.executable, "-c", LAUNCHER, pbj_dir] + [arg.format(category=category) for arg in arguments]
+        # cwd: `-s` saves it
+        subprocess.run(command, env=environment, cwd=BENCH_HOME, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    negative: List[str] = []
+    with open(log_file, 'r') as f:
+        entries: List[Dict[str, object]] = [json.loads(line) for line in f]
+    for entry in entries:
+        for name, phase in list(entry["phases"].items()) + [("total", entry["total"])]:
+            for counter, value in phase.items():
+                if value < 0:
+                    negative.append(f"pbj {' '.join(entry['argv'])}: {name} {counter} {value}")
+        print(f"pbj {' '.join(entry['argv'])}: {len(entry['phases'])} phases, {entry['total']['read_bytes']} bytes read")
+    if len(entries) != len(PROFILE_COMMANDS):
+        print(f"FAIL: {len(entries)} profiles logged for {len(PROFILE_COMMANDS)} commands")
+    elif negative:
+        print("FAIL: negative counters:\n  " + "\n  ".join(negative))
+    else:
+        print("ok")
+    return len(entries) == len(PROFILE_COMMANDS) and not negative
+
+def reset_pbj() -> None:
+    # forget what pbj cached about the previous set's files
+    pbj.config_cache.update({"signature": None, "config": {}, "reads": 0})
+    pbj.bookmarks_state.update({"bookmarks": None, "signature": None, "index": None})
+    pbj.validation_state.update({"validated": False, "stamp": {}, "signature": None})
+
+def jump(sizes: Tuple[int, ...]) -> None:
+    """
+    Prints the median time of `load_bookmarks()` plus a jump by key,
+    per set size, for a set made of categories of JUMP_CATEGORY_SIZE
+    bookmarks and a set of one category: with the binary index
+    (categories decoded on use, the jump binary searched), and with
+    the whole of bookmarks.json parsed instead.
+    """
+    print(f"{'bookmarks':>10} {'categories':>11} {'indexed':>10} {'full parse':>11}")
+    cwd: str = os.getcwd()
+    for size in sizes:
+        for categories in (max(1, size // JUMP_CATEGORY_SIZE), 1):
+            bookmarks: Dict[str, Dict[str, str]] = write_set(size, categories)
+            category: str = next(iter(sorted(bookmarks)))
+
+            def parse_and_jump() -> None:
+                with open(pbj.BOOKMARKS_FILE, 'r') as f:
+                    parsed: Dict[str, Dict[str, str]] = pbj.read_bookmarks_file(f, presorted=True)
+                pbj.change_directory(parsed, category, "pbj.bookmarks")
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                pbj.load_bookmarks() # sorts the file, and writes it with its index
+                indexed: List[float] = repeat(lambda: pbj.change_directory(pbj.load_bookmarks(), category, "pbj.bookmarks"))
+                full: List[float] = repeat(parse_and_jump)
+            os.chdir(cwd)
+            print(f"{size:>10} {categories:>11} {format_seconds(statistics.median(indexed)):>10} {format_seconds(statistics.median(full)):>11}", flush=True)
+
+def hung(timeout: float) -> bool:
+    """
+    Jumps to a bookmark whose directory never answers a stat, in a
+    fresh interpreter as the pbj wrapper runs it, with "path_timeout"
+    set to `timeout`. Returns True if pbj gave up on the directory
+    and exited within `timeout` plus HUNG_MARGIN seconds.
+    """
+    bookmarks: Dict[str, Dict[str, str]] = write_set(10, 1)
+    category: str = next(iter(bookmarks))
+    hung_dir: str = os.path.join(BENCH_HOME, "hung")
+    os.makedirs(hung_dir)
+    pbj.set_config_value("path_timeout", f"{timeout:g}")
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        bookmarks = pbj.load_bookmarks()
+        pbj.apply_change(bookmarks, ("save", category, "hung", hung_dir))
+        pbj.commit_changes(bookmarks, [("save", category, "hung", hung_dir)])
+    pbj_dir: str = os.path.dirname(os.path.abspath(pbj.__file__))
+    # the jump cache would answer in bash: leave it to pbj.py
+    command: List[str] = [sys.executable, "-c", HUNG_LAUNCHER, hung_dir, pbj_dir, category, "hung"]
+
+    start: float = time.perf_counter()
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout + HUNG_MARGIN + 60)
+    except subprocess.TimeoutExpired:
+        print(f"FAIL: the jump to a hung directory didn't return (path_timeout {timeout:g}s)")
+        return False
+    seconds: float = time.perf_counter() - start
+    print(f"jump to a hung directory: {format_seconds(seconds)} (path_timeout {timeout:g}s, margin {HUNG_MARGIN:g}s)")
+    gave_up: bool = "did not answer" in result.stdout
+    if not gave_up:
+        print(f"FAIL: pbj didn't report the directory as hung: {result.stdout.strip()!r} {result.stderr.strip()!r}")
+    elif seconds > timeout + HUNG_MARGIN:
+        print(f"FAIL: took {seconds:.2f}s, over {timeout + HUNG_MARGIN:g}s")
+    else:
+        print("ok")
+    return gave_up and seconds <= timeout + HUNG_MARGIN
+
+def imports() -> bool:
+    """
+    Imports a path list into a new category, "proj", holding a directory
+    named "proj" too, as `pbj --import FILE proj` does. Returns True if
+    the key given to that directory isn't the category's name, and the
+    bookmarks, as loaded again, pass `pbj.validate_bookmarks()`.
+    """
+    import pbj_import
+    write_set(10, 1)
+    paths: List[str] = [os.path.join(BENCH_HOME, name) for name in ("proj", "other")]
+    for path in paths:
+        os.makedirs(path)
+    list_file: str = os.path.join(BENCH_HOME, "paths.txt")
+    with open(list_file, 'w') as f:
+        f.write("\n".join(paths) + "\n")
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        imported: bool = pbj_import.import_bookmarks(pbj.load_bookmarks(), list_file, "proj")
+    reset_pbj()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        bookmarks: Dict[str, Dict[str, str]] = pbj.load_bookmarks()
+        keys: List[str] = list(bookmarks.get("proj", {}))
+        valid: bool = pbj.validate_bookmarks(bookmarks)
+    print(f"imported into 'proj': {', '.join(keys) or 'nothing'}")
+    if not imported or len(keys) != len(paths):
+        print("FAIL: not every path was imported")
+    elif not valid:
+        print(f"FAIL: the imported bookmarks don't pass validation: {output.getvalue().strip()}")
+    else:
+        print("ok")
+    return imported and len(keys) == len(paths) and valid
+
+def jump_imports(lines: List[str]) -> Tuple[float, List[str]]:
+    """
+    Returns the milliseconds spent importing pbj and whatever it imports
+    later on (lazily), and the names of those modules, from the
+    `-X importtime` output `lines`. Modules imported before pbj are
+    the interpreter's own.
+    """
+    entries: List[Tuple[int, int, str]] = []
+    for line in lines:
+        fields: List[str] = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdecimal():
+            continue # the header
+        name: str = fields[2].rstrip()
+        depth: int = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(fields[1]), depth, name.strip()))
+
+    top_level: List[int] = [i for i, (_, depth, _) in enumerate(entries) if depth == 0]
+    pbj_entry: int = next(i for i in top_level if entries[i][2] == "pbj")
+    # modules are listed when done, so pbj's own imports come right before it
+    start: int = max((i + 1 for i in top_level if i < pbj_entry), default=0)
+    microseconds: int = sum(cumulative for cumulative, depth, _ in entries[start:] if depth == 0)
+    return (microseconds / 1e3, [name for _, _, name in entries[start:]])
+
+def run(sizes: Tuple[int, ...], output_file: str) -> None:
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        for categories in category_counts(size):
+            label: str = f"{size}x{categories}"
+            print(f"{label}: generating", flush=True)
+            for name, timings in run_set(size, categories).items():
+                results[f"{name}@{label}"] = summarize(timings)
+                print(f"  {name:<28} {format_seconds(results[f'{name}@{label}']['median_s']):>10}", flush=True)
+
+    report: Dict[str, object] = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"results written to {output_file}")
+
+def run_set(size: int, categories: int) -> Dict[str, List[float]]:
+    """Writes one synthetic set to the scratch HOME and times each operation on it."""
+    bookmarks: Dict[str, Dict[str, str]] = write_set(size, categories)
+    category: str = next(iter(sorted(bookmarks)))
+    config_dir: str = os.path.dirname(pbj.CONFIG_FILE)
+
+    timings: Dict[str, List[float]] = {}
+    # the first load finds the file unsorted and writes it back sorted.
+    # that's once per hand edit, so it's timed apart from regular loads:
+    timings["load_bookmarks_unsorted"] = [timed(pbj.load_bookmarks)]
+    timings["load_bookmarks"] = repeat(pbj.load_bookmarks)
+    loaded: Dict[str, Dict[str, str]] = pbj.load_bookmarks()
+    # categories are decoded on use: make this one a plain dict for
+    # the operations below, which time the work, not the decoding
+    loaded = pbj.SortedDict(loaded.items(), presorted=True)
+    pbj.set_loaded_bookmarks(loaded, pbj.get_storage_signature())
+
+    timings["sort_bookmarks_unsorted"] = repeat(lambda: pbj.sort_bookmarks(bookmarks))
+    timings["sort_bookmarks_sorted"] = repeat(lambda: pbj.sort_bookmarks(loaded))
+    timings["remove_duplicate_values"] = repeat(
+        pbj.remove_duplicate_values,
+        setup=lambda: ({c: dict(items) for c, items in bookmarks.items()},),
+    )
+
+    # saves go to real directories: value_is_valid() checks them
+    save_dirs: List[str] = []
+    def next_save() -> Tuple[Dict[str, Dict[str, str]], str, str, str]:
+        path: str = os.path.join(BENCH_HOME, f"save{len(save_dirs)}")
+        os.makedirs(path, exist_ok=True)
+        save_dirs.append(path)
+        return (loaded, category, f"saved{len(save_dirs)}", path)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        timings["save_to_category"] = repeat(pbj.save_to_category, setup=next_save)
+
+        cwd: str = os.getcwd()
+        timings["change_directory_key"] = repeat(lambda: pbj.change_directory(loaded, category, "pbj.bookmarks"))
+        number: str = str(list(loaded[category]).index("pbj.bookmarks") + 1)
+        timings["change_directory_number"] = repeat(lambda: pbj.change_directory(loaded, category, number))
+        os.chdir(cwd)
+
+        timings["ls_category"] = repeat(lambda: pbj.ls_category(loaded, category))
+        timings["ls_all"] = repeat(lambda: pbj.ls_all(loaded))
+    return timings
+
+def repeat(operation: Callable, setup: Callable = None) -> List[float]:
+    """
+    Times `operation` until it has run MIN_SECONDS in total, between
+    MIN_REPEATS and MAX_REPEATS times, after one untimed run to warm
+    up (lazy imports, caches). `setup` returns the arguments for each
+    run, untimed.
+    """
+    operation(*(setup() if setup else ()))
+    timings: List[float] = []
+    while len(timings) < MAX_REPEATS and (len(timings) < MIN_REPEATS or sum(timings) < MIN_SECONDS):
+        args: tuple = setup() if setup else ()
+        timings.append(timed(operation, *args))
+    return timings
+
+def sort_key(name: str) -> Tuple[int, int, str]:
+    # by set size, then category count, then operation
+    operation, _, label = name.partition("@")
+    size, _, categories = label.partition("x")
+    return (int(size or 0), int(categories or 0), operation)
+
+def startup(budget_ms: float) -> bool:
+    """
+    Runs `pbj <category> pbj.bookmarks` STARTUP_REPEATS times in a
+    fresh interpreter, as the pbj wrapper does, and checks the median
+    import time against `budget_ms`. Returns True if within budget and
+    none of STARTUP_EXCLUDED_MODULES was imported.
+    """
+    bookmarks: Dict[str, Dict[str, str]] = write_set(1000, 1)
+    category: str = next(iter(bookmarks))
+    pbj_dir: str = os.path.dirname(os.path.abspath(pbj.__file__))
+    # the wrapper imports pbj from its cached bytecode, so make sure
+    # there is some (even under PYTHONDONTWRITEBYTECODE)
+    py_compile.compile(os.path.join(pbj_dir, "pbj.py"))
+    command: List[str] = [sys.executable, "-X", "importtime", "-c", LAUNCHER, pbj_dir, category, "pbj.bookmarks"]
+
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) # writes the jump cache
+    import_ms: List[float] = []
+    wall_s: List[float] = []
+    modules: set[str] = set()
+    for _ in range(STARTUP_REPEATS):
+        start: float = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall_s.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            print(f"FAIL: {' '.join(command)} exited with status {result.returncode}")
+            return False
+        milliseconds, names = jump_imports(result.stderr.splitlines())
+        import_ms.append(milliseconds)
+        modules.update(names)
+    bare_s: List[float] = repeat(lambda: subprocess.run([sys.executable, "-c", "pass"]))
+
+    median_ms: float = statistics.median(import_ms)
+    excluded: List[str] = sorted(modules.intersection(STARTUP_EXCLUDED_MODULES))
+    print(f"jump: {format_seconds(statistics.median(wall_s))} with -X importtime (interpreter alone: {format_seconds(statistics.median(bare_s))})")
+    print(f"imports: {median_ms:.2f}ms (budget {budget_ms:.2f}ms), {len(modules)} modules: {' '.join(sorted(modules))}")
+    if excluded:
+        print(f"FAIL: the jump path imported {', '.join(excluded)}")
+    elif median_ms > budget_ms:
+        print(f"FAIL: imports took {median_ms:.2f}ms, over the {budget_ms:.2f}ms budget")
+    else:
+        print("ok")
+    return not excluded and median_ms <= budget_ms
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": len(timings),
+    }
+
+def timed(operation: Callable, *args) -> float:
+    start: float = time.perf_counter()
+    operation(*args)
+    return time.perf_counter() - start
+
+def usage() -> None:
+    print(__doc__.strip())
+
+def write_set(size: int, categories: int) -> Dict[str, Dict[str, str]]:
+    """
+    Writes a synthetic set to the scratch HOME, validated, and returns
+    it. The first category also holds "pbj.bookmarks", a directory
+    that exists, to jump to.
+    """
+    config_dir: str = os.path.dirname(pbj.CONFIG_FILE)
+    shutil.rmtree(config_dir, ignore_errors=True)
+    os.makedirs(config_dir)
+    bookmarks: Dict[str, Dict[str, str]] = make_bookmarks(size, categories)
+    category: str = next(iter(sorted(bookmarks)))
+    bookmarks[category]["pbj.bookmarks"] = config_dir
+    with open(pbj.CONFIG_FILE, 'w') as f:
+        json.dump({"default_category": category, "bookmarks_file": pbj.BOOKMARKS_FILE, "storage": "json"}, f)
+    with open(pbj.BOOKMARKS_FILE, 'w') as f:
+        json.dump(bookmarks, f)
+    reset_pbj()
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        pbj.initialize()
+        pbj.write_validation_stamp(force=True)
+    return bookmarks
+
+if __name__ == "__main__":
+    argv: List[str] = sys.argv[1:]
+    if argv[:1] == ["compare"] and len(argv) == 3:
+        compare(argv[1], argv[2])
+    elif argv[:1] == ["startup"] and len(argv) in (1, 3):
+        budget_ms: float = STARTUP_BUDGET_MS
+        if len(argv) == 3 and argv[1] == "--budget":
+            budget_ms = float(argv[2])
+        elif len(argv) == 3:
+            usage()
+            sys.exit(2)
+        if not startup(budget_ms):
+            sys.exit(1)
+    elif argv[:1] == ["jump"] and len(argv) in (1, 3):
+        sizes: Tuple[int, ...] = JUMP_SIZES
+        if len(argv) == 3 and argv[1] == "--sizes":
+            sizes = tuple(int(size) for size in argv[2].split(","))
+        elif len(argv) == 3:
+            usage()
+            sys.exit(2)
+        jump(sizes)
+    elif argv[:1] == ["hung"] and len(argv) in (1, 3):
+        timeout: float = HUNG_TIMEOUT
+        if len(argv) == 3 and argv[1] == "--timeout":
+            timeout = float(argv[2])
+        elif len(argv) == 3:
+            usage()
+            sys.exit(2)
+        if not hung(timeout):
+            sys.exit(1)
+    elif argv == ["import"]:
+        if not imports():
+            sys.exit(1)
+    elif argv == ["profile"]:
+        if not profile():
+            sys.exit(1)
+    elif argv[:1] == ["run"]:
+        sizes: Tuple[int, ...] = DEFAULT_SIZES
+        output_file: str = f"pbj_bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        options: List[str] = argv[1:]
+        while options:
+            option: str = options.pop(0)
+            if option == "--sizes" and options:
+                sizes = tuple(int(size) for size in options.pop(0).split(","))
+            elif option == "--output" and options:
+                output_file = options.pop(0)
+            else:
+                usage()
+                sys.exit(2)
+        run(sizes, os.path.abspath(output_file))
+    else:
+        usage()
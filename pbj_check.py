@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import json
+import os
+import queue
+import stat
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import pbj
+
+# `pbj --check` stats the bookmarked paths on CHECK_WORKERS threads. A
+# path that doesn't answer within the "path_timeout" of config.json (a
+# hung NFS or sshfs mount), the wait jumps allow it too, is reported as
+# "timeout" and its thread is given up on, with a new one started in
+# its place. The threads are daemon threads: pbj exits without waiting
+# for those stuck in the kernel.
+CHECK_WORKERS: int = 16
+# paths that answer, but take longer than this, are reported as "slow"
+CHECK_SLOW: float = 0.5
+
+# report order, and what `--prune` removes
+STATUSES: Tuple[str, ...] = ("ok", "slow", "missing", "inaccessible", "timeout")
+PRUNED_STATUSES: Tuple[str, ...] = ("missing",)
+
+def check_bookmarks(bookmarks: Dict[str, Dict[str, str]], categories: List[str], prune: bool = False) -> bool:
+    """
+    Checks the paths of `categories`, each distinct path once, prints
+    the bookmarks with a problem and a summary, and saves the results
+    to `pbj.HEALTH_FILE` for listings to mark. With `prune`, removes
+    the bookmarks whose directory is gone in a single write, save those
+    of read-only bookmark layers, which are listed. Returns True if
+    every path is fine.
+    """
+    entries: List[Tuple[str, str, str]] = [
+        (category, key, path) for category in categories for key, path in bookmarks[category].items()
+    ]
+    paths: List[str] = list(dict.fromkeys(path for _, _, path in entries))
+    print(f"checking {len(paths)} paths in {len(categories)} categories...")
+    start: float = time.time()
+    results: Dict[str, Tuple[str, float, str]] = check_paths(paths)
+    elapsed: float = time.time() - start
+
+    counts: Dict[str, int] = {status: 0 for status in STATUSES}
+    for status, _, _ in results.values():
+        counts[status] += 1
+    for category, key, path in entries:
+        status, seconds, detail = results[path]
+        if status != "ok":
+            print(f"  {status:<12} {category}:{key}  {path}  ({detail}, {seconds:.2f}s)")
+    print(f"checked {len(paths)} paths in {elapsed:.2f}s: " + ", ".join(f"{counts[status]} {status}" for status in STATUSES))
+
+    if prune:
+        # with bookmark layers, only the user's own bookmarks can go
+        user: Dict[str, Dict[str, str]] = pbj.get_user_bookmarks(bookmarks)
+        dead: List[Tuple[str, str, str]] = [entry for entry in entries if results[entry[2]][0] in PRUNED_STATUSES]
+        changes: List[Tuple[str, ...]] = [
+            ("delete_key", category, key) for category, key, _ in dead if key in user.get(category, {})
+        ]
+        for category, key, path in dead:
+            if key not in user.get(category, {}):
+                print(f"  not removable {category}:{key}  {path}  (from a read-only bookmark layer)")
+        # the pruned categories as they were, put back if the commit fails
+        # (`commit_changes()` takes the loaded bookmarks, not a copy)
+        originals: Dict[str, Dict[str, str]] = {
+            category: pbj.SortedDict(bookmarks[category], presorted=True)
+            for category in dict.fromkeys(category for _, category, _ in changes)
+        }
+        for change in changes:
+            pbj.apply_change(bookmarks, change)
+        if changes and not pbj.commit_changes(bookmarks, changes):
+            for category, items in originals.items():
+                bookmarks[category] = items
+            if pbj.bookmarks_state["bookmarks"] is bookmarks:
+                pbj.bookmarks_state["index"] = None # rebuilt on next use
+            print("prune failed. nothing was removed.")
+        else:
+            print(f"pruned {len(changes)} bookmarks")
+    save_results(bookmarks, results)
+    return counts["ok"] == len(paths)
+
+def check_paths(paths: List[str], timeout: float = None, workers: int = CHECK_WORKERS) -> Dict[str, Tuple[str, float, str]]:
+    """
+    Returns {path: (status, seconds, detail)} for each of `paths`,
+    checked concurrently with `stat_path()`. Returns once every path
+    has answered or run out of `timeout` (default:
+    `pbj.get_path_timeout()`), whatever the threads still stuck on a
+    path are doing.
+    """
+    if timeout is None:
+        timeout = pbj.get_path_timeout()
+    pending: queue.SimpleQueue = queue.SimpleQueue()
+    for path in paths:
+        pending.put(path)
+    results: Dict[str, Tuple[str, float, str]] = {}
+    started: Dict[str, float] = {} # paths being checked: when their check started
+    changed: threading.Condition = threading.Condition()
+
+    def worker() -> None:
+        while True:
+            try:
+                path: str = pending.get_nowait()
+            except queue.Empty:
+                return
+            with changed:
+                started[path] = time.monotonic()
+            status, detail = stat_path(path)
+            with changed:
+                if path in started: # else it was given up on
+                    seconds: float = time.monotonic() - started.pop(path)
+                    if status == "ok" and seconds > CHECK_SLOW:
+                        status, detail = "slow", "answered, slowly"
+                    results[path] = (status, seconds, detail)
+                    changed.notify()
+
+    def start_worker() -> None:
+        threading.Thread(target=worker, daemon=True).start()
+
+    for _ in range(min(workers, len(paths))):
+        start_worker()
+    with changed:
+        while len(results) < len(paths):
+            now: float = time.monotonic()
+            for path, path_start in list(started.items()):
+                if now - path_start >= timeout:
+                    del started[path]
+                    results[path] = ("timeout", now - path_start, f"no answer within {timeout:g}s")
+                    start_worker() # in place of the one stuck on `path`
+            if len(results) == len(paths):
+                break
+            # paths started later time out later than the oldest one
+            deadline: float = min(started.values(), default=now) + timeout
+            changed.wait(max(deadline - now, 0.01))
+    return results
+
+def save_results(bookmarks: Dict[str, Dict[str, str]], results: Dict[str, Tuple[str, float, str]]) -> None:
+    # merged into the results of earlier checks (of other categories),
+    # less the paths no longer bookmarked
+    health: Dict[str, list] = {}
+    try:
+        with open(pbj.HEALTH_FILE, 'r') as f:
+            health = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        pass
+    now: float = time.time()
+    health.update({path: [status, now, round(seconds, 3)] for path, (status, seconds, _) in results.items()})
+    bookmarked: set[str] = {path for items in bookmarks.values() for path in items.values()}
+    health = {path: result for path, result in health.items() if path in bookmarked}
+    try:
+        pbj.write_file_atomically(pbj.HEALTH_FILE, json.dumps(health))
+    except OSError as e:
+        print(f"save_results(): {type(e).__name__}: {e}")
+
+def stat_path(path: str) -> Tuple[str, str]:
+    """Returns the status of bookmarked `path` ("ok", "missing" or "inaccessible") and a detail."""
+    path = os.path.expanduser(path)
+    try:
+        st: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return ("missing", "no such directory")
+    except OSError as e:
+        return ("inaccessible", f"{type(e).__name__}: {e.strerror}")
+    if not stat.S_ISDIR(st.st_mode):
+        return ("missing", "not a directory")
+    if not os.access(path, os.X_OK):
+        return ("inaccessible", "no permission to enter")
+    return ("ok", "")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import contextlib
+import io
+import os
+import signal
+import socket
+import traceback
+from typing import Dict, Tuple
+
+import pbj
+
+# The bash wrapper finds the daemon through the same path.
+# Override it for both by exporting PBJ_SOCKET before sourcing pbj.
+SOCKET_FILE: str = os.environ.get("PBJ_SOCKET") or os.path.join(os.path.dirname(pbj.CONFIG_FILE), "pbj.sock")
+
+# replies start with one of these status lines:
+REPLY_OK: str = "ok"
+REPLY_STAY: str = "stay" # a jump that went nowhere: messages only, no cd
+REPLY_MISS: str = "miss" # wrapper falls back to running pbj.py
+
+def daemon_is_running(socket_file: str = SOCKET_FILE) -> bool:
+    client: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_file)
+        return True
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+def files_signature() -> Tuple[Tuple[int, int, int], ...]:
+    # json storage: saves from other shells land in the journal
+    return (pbj.get_file_signature(pbj.CONFIG_FILE),) + pbj.get_storage_signature()
+
+def handle_request(bookmarks: Dict[str, Dict[str, str]], request: str) -> str:
+    """
+    Answers one request line from the bash wrapper:
+    `cwd <TAB> current_category <TAB> term_width [<TAB> arg]...`
+    The args are the ones the user gave to `pbj`. Returns the
+    status line followed by whatever `pbj.dispatch()` printed: the
+    path jumped to, or, with `REPLY_STAY`, only messages.
+    """
+    fields: list[str] = request.rstrip("\n").split("\t")
+    if len(fields) < 3:
+        return f"{REPLY_MISS}\n"
+    cwd, current_category, term_width = fields[:3]
+    argv: list[str] = request_argv(request)
+    if not request_is_supported(argv):
+        return f"{REPLY_MISS}\n"
+
+    # run with the caller's cwd and environment. `-s`/`-c` save
+    # the cwd.
+    try:
+        os.chdir(cwd)
+        start_dir: str = os.getcwd()
+    except OSError:
+        return f"{REPLY_MISS}\n"
+    if current_category:
+        os.environ["PBJ_CURRENT_CATEGORY"] = current_category
+    else:
+        os.environ.pop("PBJ_CURRENT_CATEGORY", None)
+    os.environ["PBJ_TERM_WIDTH"] = term_width
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        pbj.dispatch(bookmarks, argv)
+    if request_is_jump(bookmarks, argv) and os.getcwd() == start_dir:
+        return f"{REPLY_STAY}\n{output.getvalue()}"
+    return f"{REPLY_OK}\n{output.getvalue()}"
+
+def read_request(conn: socket.socket) -> str:
+    data: bytes = b""
+    while not data.endswith(b"\n"):
+        chunk: bytes = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode(errors="replace")
+
+def request_argv(request: str) -> list[str]:
+    return ["pbj.py"] + request.rstrip("\n").split("\t")[3:]
+
+def request_is_jump(bookmarks: Dict[str, Dict[str, str]], argv: list[str]) -> bool:
+    # as told apart by `pbj.dispatch()`: `pbj category` lists it
+    if len(argv) not in (2, 3) or argv[1].startswith("-"):
+        return False
+    return len(argv) == 3 or argv[1] not in bookmarks
+
+def request_is_mutating(argv: list[str]) -> bool:
+    return len(argv) >= 2 and argv[1] in ("-s", "-c", "-r")
+
+def request_is_supported(argv: list[str]) -> bool:
+    """
+    Returns `True` for the commands the daemon answers: jumps,
+    listings, saves and key removal. Anything interactive
+    (`input()`), or anything that hands state other than a jump
+    back to the shell (`-cu`, see `pbj.hand_to_shell()`), is left
+    to pbj.py.
+    """
+    num_args: int = len(argv)
+    if num_args == 1:
+        return True
+    arg: str = argv[1]
+    conditions: Tuple[bool, ...] = (
+        not arg.startswith("-") and num_args <= 3,
+        arg == "-a" and num_args == 2,
+        arg in ("--tsv", "--jsonl") and num_args in (2, 3),
+        arg in ("-s", "-c", "-r") and num_args in (3, 4),
+    )
+    return True in conditions
+
+def serve(bookmarks: Dict[str, Dict[str, str]] = None, socket_file: str = SOCKET_FILE) -> None:
+    """
+    Keeps `bookmarks` and config in memory and answers requests
+    on `socket_file` until interrupted. Bookmarks are reloaded
+    whenever config.json or bookmarks.json change on disk, including
+    after the daemon's own saves. Files changed other than by pbj
+    are left to pbj.py to validate, so that the user sees what it
+    reports.
+    """
+    if daemon_is_running(socket_file):
+        print(f"pbj daemon already running on {socket_file}")
+        return
+    if os.path.exists(socket_file):
+        os.unlink(socket_file) # stale socket from a daemon that died
+
+    server: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_file)
+    os.chmod(socket_file, 0o600)
+    server.listen(16)
+    # as ^C: a SystemExit would be taken for a failed request below
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    # replies go over the socket. Let go of the fd of the wrapper that
+    # started the daemon, which waits for it to close.
+    if pbj.shell_state["fd"] is not None:
+        os.close(pbj.shell_state["fd"])
+        pbj.shell_state["fd"] = None
+    print(f"pbj daemon listening on {socket_file}")
+
+    signature = files_signature() if bookmarks is not None else None
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                request: str = read_request(conn)
+                reply: str = f"{REPLY_MISS}\n"
+                current = files_signature()
+                if current != signature:
+                    # as on every start of pbj.py. While a validation is due
+                    # (its errors, duplicates removed and clashing names are
+                    # for the user to see), requests go to pbj.py, which runs it.
+                    signature = None
+                    if pbj.validation_is_current():
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            bookmarks = pbj.load_checked_bookmarks()
+                        # None: the files changed again, and failed validation
+                        signature = files_signature() if bookmarks is not None else None
+                if signature is not None:
+                    try:
+                        reply = handle_request(bookmarks, request)
+                        if request_is_mutating(request_argv(request)):
+                            signature = None # reload sorted/deduped file on next request
+                    except (Exception, SystemExit):
+                        # e.g. a stale PBJ_CURRENT_CATEGORY. Let pbj.py answer
+                        # (and report) it, and reload: a change may be half made.
+                        traceback.print_exc()
+                        reply = f"{REPLY_MISS}\n"
+                        signature = None
+                try:
+                    conn.sendall(reply.encode())
+                except OSError:
+                    pass
+            # once the reply is out: a forked fold must not hold `conn`
+            pbj.fold_visits_if_large()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_file):
+            os.unlink(socket_file)
+        print("pbj daemon stopped")
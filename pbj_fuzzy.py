@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Tuple
+
+import pbj
+
+# visit counts and last visit times, {path: [count, time]}, that the
+# visits log (`pbj.VISITS_FILE`, see `pbj.record_visit()`) is folded into:
+FRECENCY_FILE: str = os.path.join(os.path.dirname(pbj.CONFIG_FILE), "frecency.json")
+# trigram index over every key and path component, see `sync_index()`.
+INDEX_FILE: str = os.path.join(os.path.dirname(pbj.CONFIG_FILE), "fuzzy_index.sqlite3")
+
+# Bookmarks are matched by their tokens: the key and each path component,
+# lowercased. Paths share most of their components, so trigrams are
+# indexed per distinct token, and each token lists the bookmarks it is
+# part of. A lookup reads only the postings of the fragment's trigrams.
+INDEX_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    UNIQUE (category, key, path)
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS token_trigrams (
+    trigram TEXT NOT NULL,
+    token_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, token_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entry_tokens (
+    token_id INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (token_id, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entry_tokens_entry ON entry_tokens(entry_id);
+"""
+
+# like zoxide: once the visit counts add up to more than this, they
+# are all scaled down by FRECENCY_AGING, and paths left below 1 dropped.
+FRECENCY_MAX_COUNT: int = 10000
+FRECENCY_AGING: float = 0.9
+
+# how much a match is worth, by where the fragment was found:
+MATCH_WEIGHTS: Dict[str, int] = {
+    "key": 8,          # the key itself
+    "key_prefix": 4,   # the start of the key
+    "key_part": 2,     # inside the key
+    "basename": 2,     # the last component of the path
+    "path": 1,         # any other component of the path
+}
+
+def best_match(bookmarks: Dict[str, Dict[str, str]], fragment: str, category: str = None) -> str:
+    """
+    Returns the path of the highest ranked bookmark matching
+    `fragment` (in `category`, or in all categories), or "".
+    """
+    candidates: List[Tuple[float, str, str, str]] = rank(bookmarks, fragment, category, 1)
+    return candidates[0][3] if candidates else ""
+
+def connect_index(bookmarks: Dict[str, Dict[str, str]]) -> sqlite3.Connection:
+    conn: sqlite3.Connection = sqlite3.connect(INDEX_FILE)
+    conn.executescript(INDEX_SCHEMA)
+    sync_index(conn, bookmarks)
+    return conn
+
+def fold_visits() -> Dict[str, List[float]]:
+    """
+    Returns the frecency table after folding the visits log into it.
+    Folding empties the log. Besides fuzzy jumps, it is folded once it
+    grows past `pbj.VISITS_FOLD_SIZE`, see `pbj.fold_visits_if_large()`.
+    """
+    frecency: Dict[str, List[float]] = {}
+    folding_file: str = pbj.VISITS_FILE + ".folding"
+    # read under the lock too: folds may run at once (a fuzzy jump and
+    # a background fold), and each writes what it read plus its visits
+    with pbj.lock_bookmarks():
+        try:
+            with open(FRECENCY_FILE, 'r') as f:
+                frecency = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+        try:
+            # appends that open the log from here on start a new one:
+            os.rename(pbj.VISITS_FILE, folding_file)
+        except OSError:
+            return frecency # nothing visited since the last fold
+        with open(folding_file, 'r') as f:
+            for line in f:
+                fields: List[str] = line.rstrip("\n").split("\t", 1)
+                if len(fields) != 2 or not fields[0].isdecimal():
+                    continue # cut short by a crash
+                visited: float = float(fields[0])
+                count, last = frecency.get(fields[1], [0, 0])
+                frecency[fields[1]] = [count + 1, max(last, visited)]
+
+        if sum(count for count, _ in frecency.values()) > FRECENCY_MAX_COUNT:
+            frecency = {
+                path: [count * FRECENCY_AGING, last]
+                for path, (count, last) in frecency.items()
+                if count * FRECENCY_AGING >= 1
+            }
+        try:
+            pbj.write_file_atomically(FRECENCY_FILE, json.dumps(frecency))
+            os.remove(folding_file)
+        except OSError as e:
+            print(f"fold_visits(): {type(e).__name__}: {e}")
+    return frecency
+
+def frecency_score(visits: List[float], now: float) -> float:
+    """Visit count weighted by how recent the last visit was, as z/zoxide do."""
+    count, last = visits
+    age: float = now - last
+    if age < 3600:
+        return count * 4
+    elif age < 86400:
+        return count * 2
+    elif age < 604800:
+        return count * 0.5
+    return count * 0.25
+
+def match_weight(fragment: str, key: str, path: str) -> int:
+    """Returns how well `fragment` (lowercase) matches the bookmark, 0 for not at all."""
+    key = key.lower()
+    parts: List[str] = [part for part in path.lower().split("/") if part]
+    if fragment == key:
+        return MATCH_WEIGHTS["key"]
+    elif key.startswith(fragment):
+        return MATCH_WEIGHTS["key_prefix"]
+    elif fragment in key:
+        return MATCH_WEIGHTS["key_part"]
+    elif parts and fragment in parts[-1]:
+        return MATCH_WEIGHTS["basename"]
+    elif any(fragment in part for part in parts):
+        return MATCH_WEIGHTS["path"]
+    return 0
+
+def print_top(bookmarks: Dict[str, Dict[str, str]], fragment: str, limit: int = 10) -> None:
+    candidates: List[Tuple[float, str, str, str]] = rank(bookmarks, fragment, None, limit)
+    if not candidates:
+        print(f"no bookmarks match '{fragment}'")
+    for score, category, key, path in candidates:
+        print(f"{score:8.2f}  {category}:{key}  {path}")
+
+def rank(bookmarks: Dict[str, Dict[str, str]], fragment: str, category: str = None, limit: int = 10) -> List[Tuple[float, str, str, str]]:
+    """
+    Returns up to `limit` (score, category, key, path) of the bookmarks
+    in which `fragment` is part of the key or of a path component,
+    best first. Score is the match weight times (1 + frecency), so
+    among equally good matches, frequently and recently visited
+    directories come first.
+    """
+    fragment = fragment.lower()
+    if not fragment or "/" in fragment:
+        return []
+
+    # tokens holding every trigram of the fragment, or for fragments
+    # too short to have one, every token (distinct ones only):
+    trigrams: List[str] = sorted(trigrams_of(fragment))
+    if trigrams:
+        tokens_sql: str = " INTERSECT ".join(["SELECT token_id FROM token_trigrams WHERE trigram = ?"] * len(trigrams))
+    else:
+        tokens_sql = "SELECT id FROM tokens WHERE instr(token, ?)"
+        trigrams = [fragment]
+    sql: str = f"""
+        SELECT DISTINCT e.category, e.key, e.path FROM entry_tokens et
+        JOIN entries e ON e.id = et.entry_id
+        WHERE et.token_id IN ({tokens_sql})
+    """
+    try:
+        conn: sqlite3.Connection = connect_index(bookmarks)
+        rows: List[Tuple[str, str, str]] = conn.execute(sql, trigrams).fetchall()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"sqlite3 error in rank() ({INDEX_FILE}): {type(e).__name__}: {e}")
+        return []
+
+    frecency: Dict[str, List[float]] = fold_visits()
+    now: float = time.time()
+    candidates: List[Tuple[float, str, str, str]] = []
+    for entry_category, key, path in rows:
+        if category is not None and entry_category != category:
+            continue
+        weight: int = match_weight(fragment, key, path)
+        if weight:
+            visits: List[float] = frecency.get(path, [0, 0])
+            score: float = weight * (1 + frecency_score(visits, now))
+            candidates.append((score, entry_category, key, path))
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+    return candidates[:limit]
+
+def sync_index(conn: sqlite3.Connection, bookmarks: Dict[str, Dict[str, str]]) -> None:
+    """
+    Brings the index up to date with `bookmarks`, if they were saved
+    since the last sync: bookmarks that are gone are removed, new ones
+    added. Tokens no longer used by any bookmark are left in place;
+    they only cost a few rows.
+    """
+    signature: str = json.dumps(pbj.get_storage_signature())
+    row = conn.execute("SELECT value FROM meta WHERE name = 'signature'").fetchone()
+    if row and row[0] == signature:
+        return
+
+    current: set[Tuple[str, str, str]] = {
+        (category, key, path) for category, items in bookmarks.items() for key, path in items.items()
+    }
+    indexed: Dict[Tuple[str, str, str], int] = {
+        (category, key, path): entry_id
+        for entry_id, category, key, path in conn.execute("SELECT id, category, key, path FROM entries")
+    }
+    with conn:
+        removed: List[Tuple[int]] = [(indexed[entry],) for entry in indexed.keys() - current]
+        conn.executemany("DELETE FROM entry_tokens WHERE entry_id = ?", removed)
+        conn.executemany("DELETE FROM entries WHERE id = ?", removed)
+
+        added: List[Tuple[str, str, str]] = sorted(current - indexed.keys())
+        token_ids: Dict[str, int] = {}
+        if added:
+            token_ids = dict(conn.execute("SELECT token, id FROM tokens"))
+        # ids are handed out here, so that rows can go in with executemany()
+        entry_id: int = conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+        next_token_id: int = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tokens").fetchone()[0]
+        entries: List[Tuple[int, str, str, str]] = []
+        tokens: List[Tuple[int, str]] = []
+        entry_tokens: List[Tuple[int, int]] = []
+        token_trigrams: List[Tuple[str, int]] = []
+        for entry in added:
+            entry_id += 1
+            entries.append((entry_id, *entry))
+            for token in tokens_of(entry[1], entry[2]):
+                if token not in token_ids:
+                    next_token_id += 1
+                    token_ids[token] = next_token_id
+                    tokens.append((next_token_id, token))
+                    token_trigrams.extend((trigram, next_token_id) for trigram in trigrams_of(token))
+                entry_tokens.append((token_ids[token], entry_id))
+        conn.executemany("INSERT INTO entries (id, category, key, path) VALUES (?, ?, ?, ?)", entries)
+        conn.executemany("INSERT INTO tokens (id, token) VALUES (?, ?)", tokens)
+        conn.executemany("INSERT OR IGNORE INTO token_trigrams (trigram, token_id) VALUES (?, ?)", token_trigrams)
+        conn.executemany("INSERT OR IGNORE INTO entry_tokens (token_id, entry_id) VALUES (?, ?)", entry_tokens)
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('signature', ?)", (signature,))
+
+def tokens_of(key: str, path: str) -> set[str]:
+    return {key.lower()} | {part for part in path.lower().split("/") if part}
+
+def trigrams_of(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 import textwrap
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-from pbj import CONFIG_FILE, get_config_value, get_terminal_width
+from pbj import CONFIG_FILE, get_config_value, get_layer_files, get_terminal_width
 
-width: int = get_terminal_width()
+# importing this module does no work: the terminal width and config.json
+# are only read when help is printed (see `get_wrappers()`, `get_files()`).
 indent1: str = f"{' ' * 7}"
 indent2: str = f"{indent1 * 2}"
 indent3: str = f"{indent1 * 3}"
-wrapper1: textwrap = textwrap.TextWrapper(width, indent1, indent1, replace_whitespace=False)
-wrapper2: textwrap = textwrap.TextWrapper(width, indent2, indent2, replace_whitespace=False)
-wrapper3: textwrap = textwrap.TextWrapper(width,indent2, indent2, replace_whitespace=False, drop_whitespace=True)
+# the shared wrappers, by terminal width (the daemon serves several terminals)
+wrappers_cache: Dict[int, Tuple[textwrap.TextWrapper, textwrap.TextWrapper]] = {}
 # content arrays:
 name: Dict[str, str] = {
     "NAME": "pbj - change directories using mnemonics saved in a categorized list",
@@ -20,7 +20,16 @@ name: Dict[str, str] = {
 synopsis: Dict[str, Dict[str, str]] = {
     "SYNOPSIS": {
         "pbj [-s|-c|-cu|-cd|-r|-rc|-a]": "[category|key] [key]",
-        "pbj -h|--help": "[all|synopsis|description|options|files|standards |examples|tldr|help|author|license]"
+        "pbj -h|--help": "[all|synopsis|description|options|files|standards |examples|tldr|help|author|license]",
+        "pbj --daemon": "",
+        "pbj --check|--prune": "[category]",
+        "pbj --migrate": "json|sqlite|shards",
+        "pbj --top": "fragment [n]",
+        "pbj --import": "zoxide|autojump|history|file|- [category]",
+        "pbj --tsv|--jsonl": "[category]",
+        "pbj --refresh": "",
+        "pbj --dedupe": "[category]",
+        "pbj --batch": "[file|-] [--dry-run]",
     }
 }
 
@@ -40,21 +49,25 @@ options: Dict[str, Dict[str, str]] = {
         "-r": "Remove key from current category:  If the argument that follows -r is identical to a key in the current category, the key-directory pair will be deleted from the ctategory.",
         "-rc": "Remove category:  If the argument that follows -rc is identical to a category in the bookmarks file, it will be removed along with it's  key-dir pairs.",
         "-a": "List all categories and their key-directory contents",
+        "--check": "Check config files and bookmarks:  Run the full validation of config.json and bookmarks.json (otherwise validation only runs when either file changed since it last passed).  Then check the directories bookmarked in all or the specified category, several at a time, and list those that are missing, inaccessible, slow, or that didn't answer within the path_timeout of config.json (hung network mounts).  For a day, listings mark the dead paths found.",
+        "--prune": "Remove dead bookmarks:  Check the directories bookmarked in all or the specified category like --check, and remove the bookmarks whose directory no longer exists, in a single write.  Those of read-only bookmark layers are listed instead.",
+        "--migrate": "Change storage:  Copy all bookmarks to the given storage backend and switch config.json \"storage\" to it.  json keeps bookmarks in bookmarks.json.  sqlite keeps them in bookmarks.sqlite3 next to it, where saves, removals and renames update single rows instead of rewriting the whole file.  shards keeps one file per category in the bookmarks.shards directory next to it, listed in manifest.json, where a change rewrites only the files of the categories it touches.  Migrating between json and shards converts between the single-file and sharded layouts.",
+        "--top": "List fuzzy matches:  Print the n (default 10) bookmarks that best match the fragment, with their scores, the way `pbj fragment` ranks them when the fragment is not a key.  The fragment is matched against keys and path components in all categories, and matches are ranked by how well they match times frecency (how often and how recently each directory was visited).",
+        "--tsv": "List for scripts:  Print all bookmarks, or those of the specified category, one per line and unwrapped, as `category <TAB> number <TAB> key <TAB> path`.  Tabs, newlines and backslashes in paths are escaped as \\t, \\n and \\\\.",
+        "--jsonl": "List for scripts:  Like --tsv, as one JSON object per line with the fields category, number, key and path.",
+        "--import": "Import bookmarks:  Save every existing directory listed by zoxide, autojump, the `cd` lines of ~/.bash_history (or $HISTFILE), or a file with one path per line (- for stdin) to the current or specified category.  Keys are made from the directory names, with .2, .3... appended where needed.  Paths already saved in the category are skipped.  Everything is saved in a single write at the end.",
+        "--refresh": "Rewrite caches:  Regenerate the jump cache and the tab completion cache from bookmarks and config.json.  pbj does this whenever bookmarks or config.json change, and tab completion does it when its cache is older than either file.",
+        "--dedupe": "Remove duplicates:  Remove the keys whose directory is already saved under another key of the same category, in all or the specified category, and list what was removed.  Saves are checked as they are made, and every category is checked after bookmarks.json was edited outside pbj, so this is rarely needed.",
+        "--batch": "Apply scripted changes:  Read commands from the file, or stdin (- or no file), one per line: `save category key [path]`, `change category key [path]`, `remove category [key]`, `rename category old new` (a key), `rename old new` (a category) and `set-default category`.  Paths default to the cwd, words are quoted as in the shell, and # starts a comment.  Each command is checked like the interactive ones, against the bookmarks as the commands before it left them, and reported as a JSON line with its line number and either its change or an error.  If every command succeeded, all changes are saved in a single write, with no confirmation asked, and a last JSON line says whether they were.  With --dry-run, nothing is saved.",
+        "--daemon": "Run resident daemon:  Keep bookmarks and config loaded and answer jumps, listings, saves and removals over a unix socket (PBJ_SOCKET, default ~/.config/pbj/pbj.sock).  The pbj bash function uses it when running and socat or nc is installed, and runs pbj.py as usual otherwise.  Start it in the background, e.g. `(pbj --daemon &)`.",
         }
 }
 
-files: Dict[str, List[str]] = {
-    "FILES": [
-        f"config.json: {CONFIG_FILE}",
-        f"bookmarks.json: {get_config_value("bookmarks_file")}"
-    ]
-}
-
 standards: Dict[str, Dict[str, str]] = {
     "STANDARDS": {
         "Category naming rules:": "Category names must use only aphabetical characters.  Neither spaces, numbers, nor symbols may be included in a category name.  Category names may not be identical to key names",
         "Key naming rules:": "Key names may consist of alphanumeric characters.  Dots (.) may be included within a key name, but may not preceed or follow the key name (no leading or trailing dots).  Key names may not consist entirely of numerical charaters, but may consist entierly of alphabet chars.  key names may not be identical to category names.",
-        "directory naming rules:": "Directories must follow the file-system naming conventions of the host operating system.  Paths included in bookmarks.json must be directores, not files. Duplicate directory names within a category are deleted any time the bookmarks.json file is saved.",
+        "directory naming rules:": "Directories must follow the file-system naming conventions of the host operating system.  Paths included in bookmarks.json must be directores, not files. Duplicate directory names within a category are deleted when a save adds one (e.g. from another shell), after bookmarks.json was edited by hand, and by `pbj --dedupe`.",
     }
 }
 
@@ -120,6 +133,25 @@ license: Dict[str, list[str]] = {
     "LICENSE": license_content
 }
 
+def get_files() -> Dict[str, List[str]]:
+    return {
+        "FILES": [
+            f"config.json: {CONFIG_FILE}",
+            f"bookmarks.json: {get_config_value('bookmarks_file')}",
+            *(f"bookmark layer (read-only): {path}" for path in get_layer_files()),
+        ]
+    }
+
+def get_wrappers() -> Tuple[int, textwrap.TextWrapper, textwrap.TextWrapper]:
+    """Returns the terminal width, and the wrappers indenting by `indent1` and `indent2`."""
+    width: int = get_terminal_width()
+    if width not in wrappers_cache:
+        wrappers_cache[width] = (
+            textwrap.TextWrapper(width, indent1, indent1, replace_whitespace=False),
+            textwrap.TextWrapper(width, indent2, indent2, replace_whitespace=False),
+        )
+    return (width, *wrappers_cache[width])
+
 def help() -> None:
     help_name()
     help_synopsis()
@@ -133,6 +165,7 @@ def help() -> None:
     help_license()
 
 def help_name() -> None:
+    _, wrapper1, _ = get_wrappers()
     content: Dict[str, str] = name
     for title, desc in content.items():
         print(title)
@@ -140,6 +173,7 @@ def help_name() -> None:
     return
 
 def help_synopsis() -> None:
+    width, _, _ = get_wrappers()
     content: Dict[str, Dict[str, str]] = synopsis
     for k, items in content.items():
         print(k)
@@ -151,6 +185,7 @@ def help_synopsis() -> None:
     return
 
 def help_description() -> None:
+    _, wrapper1, _ = get_wrappers()
     content: Dict[str, Dict[str, str]] = description
     for key, items in content.items():
         print(key)
@@ -160,15 +195,17 @@ def help_description() -> None:
     return
 
 def help_options() -> None:
+    width, _, _ = get_wrappers()
     content: Dict[str, Dict[str, str]] = options
     wrapper: textwrap = textwrap.TextWrapper(width, indent1, indent2, replace_whitespace=False)  
     for key, items in content.items():
         print(key)
         for k, v in items.items():
-            entry: str = k + f"{' ' * (len(indent1) - len(k))}" + v
+            entry: str = k + f"{' ' * max(1, len(indent1) - len(k))}" + v
             print(wrapper.fill(entry) + "\n")
 
 def help_standards() -> None:
+    _, wrapper1, wrapper2 = get_wrappers()
     content: Dict[str, Dict[str, str]] = standards
     for key, items in content.items():
         print(key)
@@ -178,7 +215,8 @@ def help_standards() -> None:
     return
 
 def help_files() -> None:
-    content: Dict[str, List[str]] = files
+    _, wrapper1, _ = get_wrappers()
+    content: Dict[str, List[str]] = get_files()
     for key, items in content.items():
         print(key)
         for s in items:
@@ -187,13 +225,13 @@ def help_files() -> None:
     return
 
 def help_examples(reverse: bool = False) -> None:
+    width, wrapper1, wrapper2 = get_wrappers()
     # the examples can be printed in reverse order by reversing the tldr dict
     # reason: the list of examples is long. short terminals will benefit by 
     # having the simplest examples in view.
     reverse_note: str = "-- Scroll up 4 reverse print"
 
     # inner keys (description of examples) start with a dash in this tldr document
-    # reminder: wrapper1 & wrapper2 are globals
     dash_indent1: str = "     - "
     dash_indent2: str = f"{indent1 + dash_indent1}"
     wrapperk1 = textwrap.TextWrapper(width, dash_indent1, indent1, replace_whitespace=False)
@@ -238,6 +276,7 @@ def help_examples(reverse: bool = False) -> None:
                 print(revkey)
     
 def help_example_help_options() -> None:
+    width, wrapper1, wrapper2 = get_wrappers()
     content: Dict[str, Dict[str, str]] = example_help_options
     for key, items in content.items():
         print(wrapper1.fill(key))
@@ -250,6 +289,7 @@ def help_example_help_options() -> None:
     return
 
 def help_authors() -> None:
+    _, wrapper1, _ = get_wrappers()
     content: Dict[str, List[str]] = authors
     for key, items in content.items():
         print(key)
@@ -259,6 +299,7 @@ def help_authors() -> None:
     return
 
 def help_version() -> None:
+    _, wrapper1, _ = get_wrappers()
     content: Dict[str, str] = version
     for key, item in content.items():
         print(key)
@@ -266,6 +307,7 @@ def help_version() -> None:
     print()
 
 def help_license() -> None:
+    _, wrapper1, _ = get_wrappers()
     content: Dict[str, list[str]] = license
     for key, items in license.items():
         print(key)
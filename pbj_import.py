@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+import os
+import shlex
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import pbj
+
+# `pbj --import <source>`: zoxide, autojump, history, or a file holding
+# one path per line ("-" for stdin). autojump keeps its database in:
+AUTOJUMP_FILES: Tuple[str, ...] = (
+    "~/.local/share/autojump/autojump.txt",
+    "~/Library/Application Support/autojump/autojump.txt",
+)
+
+# paths are checked and turned into bookmarks this many at a time
+CHUNK_SIZE: int = 1000
+
+def directories_found(paths: List[str], hung: List[str]) -> Tuple[set[str], List[str]]:
+    """
+    Returns the members of `paths` that are existing directories, and
+    those that didn't answer within the path timeout (a hung mount, see
+    `pbj.stat_directory()`). Paths are grouped by parent, and a parent
+    holding several of them is stat'ed, then listed once with
+    `os.scandir()`, instead of stat'ing each path. The paths that
+    timed out are added to `hung`: paths below them are not tried.
+    """
+    by_parent: Dict[str, List[str]] = {}
+    for path in paths:
+        by_parent.setdefault(os.path.dirname(path), []).append(path)
+
+    found: set[str] = set()
+    unavailable: List[str] = []
+    for parent, children in by_parent.items():
+        if any(parent == path or parent.startswith(path.rstrip(os.sep) + os.sep) for path in hung):
+            unavailable.extend(children)
+            continue
+        stated: str = children[0] if len(children) == 1 else parent
+        status: str = pbj.stat_directory(stated)
+        if status == "unavailable":
+            hung.append(stated)
+            unavailable.extend(children)
+            continue
+        if len(children) == 1:
+            if status == "ok":
+                found.add(stated)
+            continue
+        if status == "missing":
+            continue
+        # the parent answered in time: listing it doesn't wait on it
+        try:
+            with os.scandir(parent) as entries:
+                names: set[str] = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            continue # parent missing or unreadable
+        found.update(path for path in children if os.path.basename(path) in names)
+    return found, unavailable
+
+def import_bookmarks(bookmarks: Dict[str, Dict[str, str]], source: str, category: str) -> bool:
+    """
+    Saves every directory read from `source` to `category` under a
+    generated key, skipping paths that are gone or already in the
+    category. All bookmarks are committed together at the end with
+    `pbj.commit_changes()`: one write, whatever their number.
+    """
+    if not pbj.category_is_valid(category) or pbj.name_is_key(bookmarks, category):
+        print(f"'{category}' is not a valid category name (see `pbj -h standards`)")
+        return False
+
+    start: float = time.time()
+    changes: List[Tuple[str, ...]] = []
+    seen: set[str] = set()
+    read: int = 0
+    missing: int = 0
+    refused: int = 0
+    unavailable: List[str] = []
+    hung: List[str] = [] # see `directories_found()`
+    # bookmark layers: the user's layer, as the imports leave it (see
+    # `pbj_layers.check_changes()`)
+    layers_scratch: Dict[str, object] = None
+    if pbj.get_config_value("bookmark_layers"):
+        import pbj_layers
+        layers_scratch = {"user": pbj.SortedDict(), "copied": set()}
+    for chunk in read_chunks(source):
+        read += len(chunk)
+        # duplicates within the source, and paths the category already has
+        fresh: List[str] = []
+        for path in chunk:
+            if path not in seen and not pbj.value_found_in_category(bookmarks, category, path):
+                fresh.append(path)
+            seen.add(path)
+        found, chunk_unavailable = directories_found(fresh, hung)
+        unavailable.extend(chunk_unavailable)
+        missing += len(fresh) - len(found) - len(chunk_unavailable)
+
+        for path in fresh:
+            if path in found:
+                change: Tuple[str, ...] = ("save", category, unique_key(bookmarks, category, path), path)
+                if layers_scratch is not None:
+                    error: str = pbj_layers.check_changes([change], layers_scratch)[0]
+                    if error:
+                        print(f"\nnot imported: {error}")
+                        refused += 1
+                        continue
+                pbj.apply_change(bookmarks, change)
+                changes.append(change)
+        print_progress(read, len(changes), start)
+
+    if not read:
+        print(f"no paths read from '{source}'")
+        return False
+    print("") # end the progress line
+    for path in unavailable:
+        print(f"not imported: '{path}' did not answer within {pbj.get_path_timeout():g}s (hung mount?)")
+    if changes and not pbj.commit_changes(bookmarks, changes):
+        print("import failed. nothing was saved.")
+        return False
+    elapsed: float = time.time() - start
+    print(f"imported {len(changes)} of {read} paths into '{category}' in {elapsed:.2f}s ({read / max(elapsed, 1e-6):.0f} paths/s)")
+    duplicates: int = read - missing - len(unavailable) - len(changes) - refused
+    print(f"skipped: {missing} not existing directories, {duplicates} duplicates"
+          + (f", {len(unavailable)} unavailable" if unavailable else "")
+          + (f", {refused} refused" if refused else ""))
+    return True
+
+def key_for_path(path: str) -> str:
+    """Returns the base key for `path`: its basename, less the characters keys can't hold."""
+    base: str = "".join(c for c in os.path.basename(path) if c.isalnum() or c == ".")
+    base = base.strip(".")
+    while ".." in base:
+        base = base.replace("..", ".")
+    if not base or base.replace(".", "").isdecimal():
+        base = "dir" + base # keys may not be numbers: those are speed-dial numbers
+    return base
+
+def print_progress(read: int, saved: int, start: float) -> None:
+    elapsed: float = max(time.time() - start, 1e-6)
+    print(f"\rread {read} paths, {saved} to import ({read / elapsed:.0f} paths/s)", end="", flush=True)
+
+def read_autojump() -> Iterator[str]:
+    # "weight <TAB> path" per line, any order
+    for autojump_file in AUTOJUMP_FILES:
+        autojump_file = os.path.expanduser(autojump_file)
+        if os.path.exists(autojump_file):
+            entries: List[Tuple[float, str]] = []
+            with open(autojump_file, 'r', errors="replace") as f:
+                for line in f:
+                    weight, _, path = line.rstrip("\n").partition("\t")
+                    try:
+                        entries.append((float(weight), path))
+                    except ValueError:
+                        continue
+            # highest weight first, so that it gets the plain key
+            for _, path in sorted(entries, reverse=True):
+                yield path
+            return
+    print("autojump database not found")
+
+def read_chunks(source: str) -> Iterator[List[str]]:
+    """Yields the absolute paths read from `source`, `CHUNK_SIZE` at a time."""
+    readers: Dict[str, object] = {
+        "zoxide": read_zoxide,
+        "autojump": read_autojump,
+        "history": read_history,
+    }
+    paths: Iterator[str] = readers[source]() if source in readers else read_path_list(source)
+    chunk: List[str] = []
+    for path in paths:
+        path = os.path.expanduser(path.strip())
+        if not os.path.isabs(path):
+            continue # relative to a cwd we don't know
+        chunk.append(os.path.normpath(path))
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def read_history() -> Iterator[str]:
+    # `cd dir` lines of the bash history, most recent first
+    history_file: str = os.environ.get("HISTFILE") or os.path.expanduser("~/.bash_history")
+    try:
+        with open(history_file, 'r', errors="replace") as f:
+            lines: List[str] = f.readlines()
+    except OSError as e:
+        print(f"read_history(): {type(e).__name__}: {e}")
+        return
+    for line in reversed(lines):
+        if not line.startswith("cd "):
+            continue
+        try:
+            words: List[str] = shlex.split(line.split(";")[0].split("&&")[0])
+        except ValueError:
+            continue # unbalanced quotes
+        if len(words) == 2 and words[1] != "-":
+            yield os.path.expandvars(words[1])
+
+def read_path_list(source: str) -> Iterator[str]:
+    if source == "-":
+        yield from sys.stdin
+        return
+    try:
+        with open(os.path.expanduser(source), 'r', errors="replace") as f:
+            yield from f
+    except OSError as e:
+        print(f"read_path_list(): {type(e).__name__}: {e}")
+
+def read_zoxide() -> Iterator[str]:
+    # `zoxide query --list` prints paths by descending score
+    try:
+        process = subprocess.Popen(["zoxide", "query", "--list"], stdout=subprocess.PIPE, text=True, errors="replace")
+    except OSError:
+        print("zoxide not found")
+        return
+    with process:
+        yield from process.stdout
+
+def unique_key(bookmarks: Dict[str, Dict[str, str]], category: str, path: str) -> str:
+    """
+    Returns a key for `path` that is valid, not yet used in `category`,
+    and not a category name, `category` included (it may be new): the
+    basename, or the basename with ".2", ".3"... appended.
+    """
+    base: str = key_for_path(path)
+    key: str = base
+    number: int = 1
+    while not pbj.key_is_valid(key) or key in bookmarks.get(category, {}) or key in bookmarks or key == category:
+        number += 1
+        key = f"{base}.{number}"
+    return key
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# on the jump path: see the note on imports at the top of pbj.py
+from __future__ import annotations
+import bisect
+import mmap
+import struct
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Tuple
+
+import pbj
+
+# A read-only binary index of bookmarks.json, "<bookmarks.json>.index",
+# that is opened with mmap and binary searched: a lookup creates no
+# Python object per bookmark, whatever their number. Layout (little
+# endian):
+#
+#   header      magic, the (mtime_ns, size, inode) of the bookmarks.json
+#               it was built from, counts, where each table starts, and
+#               the length of the category names at the start of the pool
+#   categories  one RECORD per category, by name: (name offset, name
+#               length, first entry, number of entries)
+#   entries     one RECORD per bookmark, by category then key: (key
+#               offset, key length, path offset, path length). Entry
+#               `first + n - 1` is speed-dial number n of its category.
+#   pool        the UTF-8 names, keys and paths the records point into.
+#               It starts with the category names, NUL separated, so
+#               that a load reads them all with one decode.
+#
+# An index whose recorded signature isn't that of the current
+# bookmarks.json is stale: `pbj.load_bookmarks()` then parses the file
+# and builds a new one.
+MAGIC: bytes = b"PBJIDX02"
+HEADER: struct.Struct = struct.Struct("<8sqqQIIQQQQ")
+NAME_SEPARATOR: str = "\0"
+RECORD: struct.Struct = struct.Struct("<IIII")
+
+def build_index(index_file: str, bookmarks: Dict[str, Dict[str, str]], signature: Tuple[int, int, int]) -> bool:
+    """
+    Writes the index of `bookmarks` (sorted, as read from the
+    bookmarks.json whose signature is `signature`) to `index_file`,
+    atomically.
+    """
+    pool: bytearray = bytearray()
+
+    def add(text: str) -> Tuple[int, int]:
+        data: bytes = text.encode("utf-8", "surrogatepass")
+        offset: int = len(pool)
+        pool.extend(data)
+        return offset, len(data)
+
+    name_spans: List[Tuple[int, int]] = []
+    for category in bookmarks:
+        if name_spans:
+            add(NAME_SEPARATOR)
+        name_spans.append(add(category))
+    names_length: int = len(pool)
+
+    category_records: List[bytes] = []
+    entry_records: List[bytes] = []
+    for name_span, (category, items) in zip(name_spans, bookmarks.items()):
+        category_records.append(RECORD.pack(*name_span, len(entry_records), len(items)))
+        for key, path in items.items():
+            entry_records.append(RECORD.pack(*add(key), *add(path)))
+
+    categories_offset: int = HEADER.size
+    entries_offset: int = categories_offset + RECORD.size * len(category_records)
+    pool_offset: int = entries_offset + RECORD.size * len(entry_records)
+    header: bytes = HEADER.pack(
+        MAGIC, *signature, len(category_records), len(entry_records), categories_offset, entries_offset, pool_offset, names_length
+    )
+    data: bytes = b"".join([header, *category_records, *entry_records, pool])
+    try:
+        pbj.write_file_atomically(index_file, data)
+    except OSError as e:
+        print(f"build_index(): {type(e).__name__}: {e}")
+        return False
+    return True
+
+def category_names(index: mmap.mmap) -> List[str]:
+    """Returns the category names, in order: their position is their slot."""
+    _, _, _, _, count, _, categories_offset, _, pool_offset, names_length = HEADER.unpack_from(index)
+    if not count:
+        return []
+    names: List[str] = index[pool_offset:pool_offset + names_length].decode("utf-8", "surrogatepass").split(NAME_SEPARATOR)
+    if len(names) == count:
+        return names
+    # a name holding the separator (not a valid category name, but the
+    # index is built before validation can object): one by one
+    records: bytes = index[categories_offset:categories_offset + RECORD.size * count]
+    return [
+        index[pool_offset + offset:pool_offset + offset + length].decode("utf-8", "surrogatepass")
+        for offset, length, _, _ in RECORD.iter_unpack(records)
+    ]
+
+def entry_span(index: mmap.mmap, slot: int) -> Tuple[int, int]:
+    """Returns (first entry, number of entries) of the category in `slot`."""
+    categories_offset: int = HEADER.unpack_from(index)[6]
+    return RECORD.unpack_from(index, categories_offset + RECORD.size * slot)[2:]
+
+def find(index: mmap.mmap, slot: int, keynum: str) -> str:
+    """
+    Returns the path saved under `keynum` (a key or a speed-dial
+    number) in the category in `slot`, or "" if there is none. Keys
+    are binary searched; numbers are positions.
+    """
+    entries_offset: int = HEADER.unpack_from(index)[7]
+    first, count = entry_span(index, slot)
+    if keynum.isdecimal(): # keys are never numbers
+        number: int = int(keynum)
+        if not 1 <= number <= count:
+            return ""
+        return read_path(index, entries_offset + RECORD.size * (first + number - 1))
+
+    # the pool holds UTF-8, whose byte order is code point order, the
+    # order of `pbj.sort_bookmarks()`
+    wanted: bytes = keynum.encode("utf-8", "surrogatepass")
+    low, high = first, first + count
+    while low < high:
+        middle: int = (low + high) // 2
+        key_offset, key_length, _, _ = RECORD.unpack_from(index, entries_offset + RECORD.size * middle)
+        key: bytes = read_bytes(index, key_offset, key_length)
+        if key < wanted:
+            low = middle + 1
+        elif key > wanted:
+            high = middle
+        else:
+            return read_path(index, entries_offset + RECORD.size * middle)
+    return ""
+
+def items(index: mmap.mmap, slot: int) -> Iterator[Tuple[str, str]]:
+    """Yields the (key, path) pairs of the category in `slot`, in order."""
+    entries_offset: int = HEADER.unpack_from(index)[7]
+    first, count = entry_span(index, slot)
+    for entry in range(first, first + count):
+        key_offset, key_length, path_offset, path_length = RECORD.unpack_from(index, entries_offset + RECORD.size * entry)
+        yield read_text(index, key_offset, key_length), read_text(index, path_offset, path_length)
+
+def open_index(index_file: str, signature: Tuple[int, int, int]) -> mmap.mmap:
+    """
+    Returns `index_file` mapped read-only, or None if it is missing,
+    malformed, or was built from another version of bookmarks.json
+    than the one whose signature is `signature`. The mapping outlives
+    a rebuild, which replaces the file.
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            index: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # ValueError: empty file
+        return None
+    if len(index) < HEADER.size:
+        index.close()
+        return None
+    magic, mtime_ns, size, inode = HEADER.unpack_from(index)[:4]
+    if magic != MAGIC or (mtime_ns, size, inode) != tuple(signature):
+        index.close()
+        return None
+    return index
+
+def find_category(names: List[str], category: str) -> int:
+    """Returns the slot of `category` in `names` (see `category_names()`), or -1."""
+    slot: int = bisect.bisect_left(names, category)
+    return slot if slot < len(names) and names[slot] == category else -1
+
+def read_bytes(index: mmap.mmap, offset: int, length: int) -> bytes:
+    pool_offset: int = HEADER.unpack_from(index)[8]
+    return index[pool_offset + offset:pool_offset + offset + length]
+
+def read_path(index: mmap.mmap, record_offset: int) -> str:
+    _, _, path_offset, path_length = RECORD.unpack_from(index, record_offset)
+    return read_text(index, path_offset, path_length)
+
+def read_text(index: mmap.mmap, offset: int, length: int) -> str:
+    return read_bytes(index, offset, length).decode("utf-8", "surrogatepass")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# on the jump path: see the note on imports at the top of pbj.py
+from __future__ import annotations
+import json
+import os
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Tuple
+
+import pbj
+
+# Bookmark layers: read-only bookmark files under the user's own, e.g.
+# a system catalogue in /etc/pbj/bookmarks.json and a team one checked
+# into a repo. config.json "bookmark_layers" lists them like $PATH,
+# lowest precedence first:
+#
+#   "bookmark_layers": "/etc/pbj/bookmarks.json:~/src/team/bookmarks.json"
+#
+# The user's bookmarks (the configured storage) are the top layer, and
+# the only one pbj writes to. Categories of all layers are merged by
+# name; within a category, a key of a higher layer replaces the same
+# key below it. Removing a user bookmark that overrides a layer's
+# brings the layer's back. A bookmark or category that only a lower
+# layer holds can't be removed or renamed (see `check_change()`), but
+# saving to its key overrides it.
+#
+# The lower layers are merged into a binary index (see `pbj_index`),
+# "<LAYERS_FILE>.index", which is only rebuilt when the signature of a
+# layer file changes: loading maps it and decodes the categories used,
+# whatever the size of the layers.
+LAYERS_FILE: str = os.path.join(os.path.dirname(pbj.CONFIG_FILE), "layers")
+
+# "user" holds the user's own bookmarks under the merged view last
+# returned by `merge_layers()`, and "lower" the lower layers merged.
+# `pbj.commit_changes()` applies changes to "user" as it stores them.
+# "checked" is True once `report_clashes()` has looked at the merged
+# view in this process.
+layers_state: Dict[str, object] = {
+    "user": None,
+    "lower": {},
+    "checked": False,
+}
+
+def apply_to_user_layer(view: Dict[str, Dict[str, str]], changes: List[Tuple[str, ...]]) -> bool:
+    """
+    Applies `changes` (see `pbj.commit_change()`), which the caller made
+    to the merged `view`, to the user's layer under it, then merges the
+    categories they removed from or renamed again. If `check_changes()`
+    refuses one, says why, merges the touched categories again as they
+    were (undoing the caller's changes) and returns False.
+    """
+    user: Dict[str, Dict[str, str]] = pbj.get_user_bookmarks(view)
+    if user is view:
+        return True
+    from pbj_shards import change_categories
+    errors: List[str] = [error for error in check_changes(changes) if error]
+    if errors:
+        print(errors[0])
+        remerge(view, [category for change in changes for category in change_categories(change)])
+        return False
+    for change in changes:
+        pbj.apply_change(user, change)
+    remerge(view, [category for change in changes if change[0] != "save" for category in change_categories(change)])
+    return True
+
+def check_change(change: Tuple[str, ...], user: Dict[str, Dict[str, str]]) -> str:
+    """
+    Returns why `change` (see `pbj.commit_change()`) can't be made to
+    the user's layer `user`, or "" if it can: it removes or renames a
+    bookmark or category that only a lower layer holds.
+    """
+    op, category = change[:2]
+    if op in ("delete_key", "rename_key") and change[2] not in user.get(category, {}):
+        return f"'{change[2]}' in '{category}' comes from a read-only bookmark layer"
+    if op == "delete_category" and category not in user:
+        return f"category '{category}' comes from a read-only bookmark layer"
+    if op == "rename_category" and category in layers_state["lower"]:
+        return f"category '{category}' is also in a read-only bookmark layer, and can't be renamed"
+    return ""
+
+def check_changes(changes: List[Tuple[str, ...]], scratch: Dict[str, object] = None) -> List[str]:
+    """
+    Returns, for each of `changes` in turn, why `check_change()`
+    refuses it ("" if it doesn't), as if the changes before it were
+    made. The user's layer is left as is: the categories the changes
+    touch are copied to `scratch`, which a caller checking one change
+    at a time passes from one call to the next.
+    """
+    from pbj_shards import change_categories
+    user: Dict[str, Dict[str, str]] = layers_state["user"]
+    if scratch is None:
+        scratch = {"user": pbj.SortedDict(), "copied": set()}
+    errors: List[str] = []
+    for change in changes:
+        for category in change_categories(change):
+            if category not in scratch["copied"]:
+                scratch["copied"].add(category)
+                if category in user:
+                    scratch["user"][category] = pbj.SortedDict(user[category], presorted=True)
+        error: str = check_change(change, scratch["user"])
+        if not error:
+            pbj.apply_change(scratch["user"], change)
+        errors.append(error)
+    return errors
+
+def clashes(bookmarks: Dict[str, Dict[str, str]]) -> List[str]:
+    """Returns the keys of `bookmarks` that are also categories, sorted."""
+    return sorted({key for items in bookmarks.values() for key in items}.intersection(bookmarks))
+
+def layer_files() -> List[str]:
+    """Returns the layer files listed in config.json, lowest precedence first."""
+    return [
+        os.path.expanduser(path)
+        for path in pbj.get_config_value("bookmark_layers").split(os.pathsep) if path
+    ]
+
+def layers_signature(files: List[str]) -> Tuple[int, int, int]:
+    """
+    Returns one (mtime_ns, size, inode)-shaped signature for all of
+    `files`, for the index header: it changes when any of them is
+    written, replaced, added or removed from the list.
+    """
+    signatures: List[Tuple[int, int, int]] = [pbj.get_file_signature(path) for path in files]
+    return (
+        max((mtime for mtime, _, _ in signatures), default=0),
+        sum(size for _, size, _ in signatures),
+        # ints hash the same in every process, unlike strings
+        hash(tuple(signatures)) & 0xFFFFFFFFFFFFFFFF,
+    )
+
+def load_layers(files: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the bookmarks of the layers `files` merged, from their
+    index if it is current, as a `pbj.LazyBookmarks`. Otherwise reads
+    and merges them, and indexes the result. A layer that can't be
+    read or breaks the naming rules is left out, saying why.
+    """
+    signature: Tuple[int, int, int] = layers_signature(files)
+    lower: Dict[str, Dict[str, str]] = pbj.load_bookmarks_lazily(LAYERS_FILE, signature)
+    if lower is not None:
+        return lower
+
+    lower = pbj.SortedDict()
+    for layer_file in files:
+        for category, items in read_layer(layer_file).items():
+            lower.setdefault(category, pbj.SortedDict()).update(items)
+    # each layer keeps to the naming rules, but a key of one may be a
+    # category of another
+    names: List[str] = clashes(lower)
+    if names:
+        print(f"bookmark layers not used: keys of one are categories of another: {', '.join(names)}")
+        lower = pbj.SortedDict()
+    layers_state["checked"] = False # against the user's, see `merge_layers()`
+    import pbj_index
+    pbj_index.build_index(LAYERS_FILE + ".index", lower, signature)
+    return lower
+
+def merge_layers(user: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the merged view of the bookmark layers and the user's
+    bookmarks `user`, as a `pbj.LazyBookmarks`: each category is
+    merged when first used.
+    """
+    lower: Dict[str, Dict[str, str]] = load_layers(layer_files())
+    layers_state["user"] = user
+    layers_state["lower"] = lower
+    view: Dict[str, Dict[str, str]] = pbj.LazyBookmarks(sorted(set(lower) | set(user)), merged_category)
+    if not isinstance(lower, pbj.LazyBookmarks): # just rebuilt
+        report_clashes(view)
+    return view
+
+def merged_category(category: str) -> Dict[str, str]:
+    items: Dict[str, str] = pbj.SortedDict(layers_state["lower"].get(category, {}), presorted=True)
+    items.update(layers_state["user"].get(category, {}))
+    return items
+
+def read_layer(layer_file: str) -> Dict[str, Dict[str, str]]:
+    """Returns the bookmarks of `layer_file`, or {} (after saying why) if it is unusable."""
+    try:
+        with open(layer_file, 'r') as f:
+            bookmarks: Dict[str, Dict[str, str]] = json.load(f)
+    except FileNotFoundError:
+        return {} # e.g. a team checkout not cloned on this machine
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"bookmark layer {layer_file} not used: {type(e).__name__}: {e}")
+        return {}
+    if not isinstance(bookmarks, dict) or not all(isinstance(items, dict) for items in bookmarks.values()):
+        print(f"bookmark layer {layer_file} not used: not a bookmarks file")
+        return {}
+    if bookmarks and not pbj.validate_bookmarks(bookmarks):
+        print(f"bookmark layer {layer_file} not used")
+        return {}
+    return bookmarks
+
+def report_clashes(view: Dict[str, Dict[str, str]]) -> None:
+    """
+    Says which keys of the merged `view` are also categories: a key
+    of the user's that names a layer's category, or a layer's key that
+    names one of the user's. pbj checks the names it saves against the
+    merged view, so these come from files edited or layers changed
+    outside pbj: called after the layers are rebuilt and after the
+    user's bookmarks are validated. Looks once per process, as it
+    merges every category.
+    """
+    if layers_state["checked"]:
+        return
+    layers_state["checked"] = True
+    names: List[str] = clashes(view)
+    if names:
+        print(f"bookmark layers: names that are a key in one layer and a category in another (yours included): {', '.join(names)}")
+        print("Rename them: `pbj <name>` can only mean one of the two.")
+
+def remerge(bookmarks: Dict[str, Dict[str, str]], categories: List[str]) -> None:
+    """
+    Merges `categories` of the view `bookmarks` again from the layers,
+    after the user's layer changed under them: e.g. a removed override
+    brings back a lower layer's bookmark.
+    """
+    for category in categories:
+        items: Dict[str, str] = merged_category(category)
+        if items:
+            bookmarks[category] = items
+        elif category in bookmarks:
+            del bookmarks[category]
+    if categories and pbj.bookmarks_state["bookmarks"] is bookmarks:
+        pbj.bookmarks_state["index"] = None # rebuilt on next use
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+# Enabled by PBJ_PROFILE, see `install()`:
+#   PBJ_PROFILE=1 (or "stderr")  table on stderr at exit
+#   PBJ_PROFILE=/path/to/log     one JSON line appended per run
+# Never stdout: the bash wrapper reads stdout as the path to cd to.
+PROFILE_TARGETS_STDERR: tuple = ("1", "stderr")
+
+# the pbj.py functions timed as phases. Times are inclusive: `load_bookmarks`
+# includes the `sort_bookmarks` it calls.
+PROFILED_FUNCTIONS: tuple = (
+    "validation_is_current",
+    "initialize",
+    "load_config",
+    "load_bookmarks",
+    "sort_bookmarks",
+    "remove_duplicate_values",
+    "commit_changes",
+    "save_to_bookmarks_file",
+    "write_file_atomically",
+    "write_jump_cache",
+    "change_directory",
+    "render_bookmarks",
+    "dispatch",
+)
+
+# counters per phase, and for the whole run under "total"
+profile_state: Dict[str, object] = {
+    "start": 0.0,
+    "phases": {},
+    "opens": 0,
+    "stats": 0,
+    "own_read_bytes": 0, # reads of /proc/self/io by `counters()` itself
+}
+
+PROC_IO_FILE: str = "/proc/self/io"
+
+def counters() -> Dict[str, float]:
+    """Returns the running totals: wall time, file opens, stat calls, and bytes read/written."""
+    # the reads of /proc/self/io before this one: its own isn't in the rchar it reports
+    own_read_bytes: int = profile_state["own_read_bytes"]
+    io: Dict[str, int] = read_proc_io()
+    return {
+        "s": time.perf_counter(),
+        "opens": profile_state["opens"],
+        "stats": profile_state["stats"],
+        "read_bytes": io.get("rchar", 0) - own_read_bytes,
+        "written_bytes": io.get("wchar", 0),
+    }
+
+def count_open(event: str, args: tuple) -> None:
+    # audit hook: "open" covers open(), io.open() and os.open()
+    if event == "open" and args[0] != PROC_IO_FILE:
+        profile_state["opens"] += 1
+
+def count_stats(stat: Callable) -> Callable:
+    @functools.wraps(stat)
+    def counted(*args, **kwargs):
+        profile_state["stats"] += 1
+        return stat(*args, **kwargs)
+    return counted
+
+def install(namespace: Dict[str, object]) -> None:
+    """
+    Starts profiling the pbj.py run whose globals are `namespace`:
+    wraps its PROFILED_FUNCTIONS, counts opens and stats, and reports
+    at exit. The time from process start to here is the "startup"
+    phase (interpreter start and imports).
+    """
+    age: float = process_age()
+    profile_state["start"] = counters()
+    if age:
+        record("startup", age, {})
+
+    sys.addaudithook(count_open)
+    # os.path.exists(), isdir() etc. look os.stat up at call time
+    os.stat = count_stats(os.stat)
+    os.lstat = count_stats(os.lstat)
+    for name in PROFILED_FUNCTIONS:
+        if name in namespace:
+            namespace[name] = profiled(name, namespace[name])
+    atexit.register(report)
+
+def process_age() -> float:
+    """Returns how long ago this process started (to 10ms), or 0 where /proc isn't there."""
+    try:
+        with open("/proc/self/stat", 'r') as f:
+            # fields after the command name, which may hold spaces
+            fields: List[str] = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", 'r') as f:
+            uptime: float = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    # starttime is field 22, in clock ticks after boot
+    return max(uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 0.0)
+
+def profiled(name: str, function: Callable) -> Callable:
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        before: Dict[str, float] = counters()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            after: Dict[str, float] = counters()
+            record(name, after["s"] - before["s"], {k: after[k] - before[k] for k in after if k != "s"})
+    return timed
+
+def read_proc_io() -> Dict[str, int]:
+    # bytes read and written by this process, through any API (Linux)
+    try:
+        with open(PROC_IO_FILE, 'rb') as f:
+            data: bytes = f.read()
+    except OSError:
+        return {}
+    profile_state["own_read_bytes"] += len(data)
+    text: str = data.decode()
+    return {name: int(value) for name, value in (line.split(": ") for line in text.splitlines())}
+
+def record(name: str, seconds: float, deltas: Dict[str, float]) -> None:
+    phase: Dict[str, float] = profile_state["phases"].setdefault(
+        name, {"s": 0.0, "calls": 0, "opens": 0, "stats": 0, "read_bytes": 0, "written_bytes": 0}
+    )
+    phase["s"] += seconds
+    phase["calls"] += 1
+    for counter, value in deltas.items():
+        phase[counter] += value
+
+def report() -> None:
+    """Writes the profile to stderr or the log file named by PBJ_PROFILE."""
+    start: Dict[str, float] = profile_state["start"]
+    end: Dict[str, float] = counters()
+    total: Dict[str, float] = {k: end[k] - start[k] for k in end}
+    target: str = os.environ.get("PBJ_PROFILE", "")
+    if target in PROFILE_TARGETS_STDERR:
+        lines: List[str] = [f"pbj profile: {' '.join(sys.argv[1:]) or '(no args)'}"]
+        lines.append(f"  {'phase':<24} {'calls':>5} {'ms':>9} {'opens':>6} {'stats':>6} {'read':>9} {'written':>9}")
+        for name, phase in list(profile_state["phases"].items()) + [("total", dict(total, calls=1))]:
+            lines.append(
+                f"  {name:<24} {phase['calls']:>5} {phase['s'] * 1e3:>9.2f} {phase.get('opens', 0):>6} "
+                f"{phase.get('stats', 0):>6} {phase.get('read_bytes', 0):>9} {phase.get('written_bytes', 0):>9}"
+            )
+        sys.stderr.write("\n".join(lines) + "\n")
+        return
+
+    entry: Dict[str, object] = {
+        "time": time.time(),
+        "argv": sys.argv[1:],
+        "total": total,
+        "phases": profile_state["phases"],
+    }
+    try:
+        with open(os.path.expanduser(target), 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        sys.stderr.write(f"pbj profile: can't write {target}: {type(e).__name__}: {e}\n")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+import json
+import os
+import zlib
+from typing import Dict, List, Tuple
+
+import pbj
+
+# Sharded storage: one JSON file per category (see `shard_name()`) in
+# a directory next to bookmarks.json, plus a manifest listing the
+# categories in order with their shard files, and the default
+# category. A change rewrites only the shards of the categories it
+# touches, then the manifest. The manifest is written last, so its
+# signature (which the storage signature, the validation stamp and
+# the jump cache look at) changes with every commit.
+#
+# Category names are letters only (see `pbj.category_is_valid()`), so
+# they are safe in file names. But "Work" and "work" are one file name
+# on a case-insensitive file system (macOS, Windows), so shard names
+# carry a checksum of the exact name. The manifest maps each category
+# to its shard: shards named otherwise by an earlier pbj are still
+# read, and renamed when their category is next written.
+MANIFEST_VERSION: int = 1
+
+def apply_change(manifest_file: str, change: Tuple[str, ...]) -> bool:
+    """Applies one change, as passed to `pbj.commit_change()`, see `apply_changes()`."""
+    return apply_changes(manifest_file, [change])
+
+def apply_changes(manifest_file: str, changes: List[Tuple[str, ...]]) -> bool:
+    """
+    Applies `changes` (see `pbj.commit_change()`) to the stored shards:
+    reads the shards of the categories they name, applies them with
+    `pbj.apply_change()`, and writes back only those shards, each
+    atomically, then the manifest. Shards of categories deleted or
+    renamed away, or written under a new name, are removed after the
+    manifest stops listing them. The caller holds the bookmarks lock.
+    """
+    manifest: Dict[str, object] = read_manifest(manifest_file)
+    if manifest is None:
+        return False
+    shard_dir: str = os.path.dirname(manifest_file)
+    files: Dict[str, str] = manifest["categories"]
+
+    # the categories the changes touch, as stored now
+    touched: Dict[str, Dict[str, str]] = pbj.SortedDict()
+    try:
+        for change in changes:
+            for category in change_categories(change):
+                if category not in touched and category in files:
+                    touched[category] = read_shard(os.path.join(shard_dir, files[category]))
+            pbj.apply_change(touched, change)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"apply_changes(): {type(e).__name__}: {e}")
+        return False
+
+    gone: List[str] = [
+        category for change in changes for category in change_categories(change)
+        if category in files and category not in touched
+    ]
+    new_files: Dict[str, str] = {category: name for category, name in files.items() if category not in gone}
+    new_files.update({category: shard_name(category) for category in touched})
+    try:
+        for category, items in touched.items():
+            pbj.write_file_atomically(os.path.join(shard_dir, new_files[category]), json.dumps(items, indent=4), durable=True)
+        write_manifest(manifest_file, new_files)
+        listed: set[str] = set(new_files.values())
+        for category in dict.fromkeys(gone + list(touched)):
+            if category in files and files[category] not in listed:
+                remove_shard(os.path.join(shard_dir, files[category]))
+    except OSError as e:
+        print(f"apply_changes(): {type(e).__name__}: {e}")
+        return False
+    return True
+
+def change_categories(change: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Returns the categories whose shard `change` reads or writes."""
+    if change[0] == "rename_category":
+        return change[1:3]
+    return change[1:2]
+
+def load_bookmarks(manifest_file: str, categories: List[str] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the bookmarks of `categories` (default: all), in manifest
+    order, as SortedDicts. Shards written by pbj are sorted already;
+    one edited by hand is sorted on load. Returns {} if the manifest
+    or a shard can't be read.
+    """
+    manifest: Dict[str, object] = read_manifest(manifest_file)
+    if manifest is None:
+        return {}
+    shard_dir: str = os.path.dirname(manifest_file)
+    files: Dict[str, str] = manifest["categories"]
+    bookmarks: Dict[str, Dict[str, str]] = pbj.SortedDict()
+    try:
+        for category in (files if categories is None else categories):
+            if category in files:
+                bookmarks[category] = read_shard(os.path.join(shard_dir, files[category]))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"load_bookmarks() ({shard_dir}): {type(e).__name__}: {e}")
+        return {}
+    return bookmarks
+
+def load_bookmarks_lazily(manifest_file: str) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the bookmarks as a `pbj.LazyBookmarks`: only the manifest
+    is read here, and each shard when its category is first used.
+    Returns {} if the manifest can't be read.
+    """
+    manifest: Dict[str, object] = read_manifest(manifest_file)
+    if manifest is None:
+        return {}
+    shard_dir: str = os.path.dirname(manifest_file)
+    files: Dict[str, str] = manifest["categories"]
+
+    def load_category(category: str) -> Dict[str, str]:
+        try:
+            return read_shard(os.path.join(shard_dir, files[category]))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"load_bookmarks_lazily() ({shard_dir}): {type(e).__name__}: {e}")
+            return pbj.SortedDict()
+    return pbj.LazyBookmarks(sorted(files), load_category)
+
+def read_manifest(manifest_file: str) -> Dict[str, object]:
+    """Returns the parsed manifest, or None (after saying why) if it can't be read."""
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest: Dict[str, object] = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"read_manifest() ({manifest_file}): {type(e).__name__}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or not isinstance(manifest.get("categories"), dict):
+        print(f"read_manifest(): {manifest_file} is not a version {MANIFEST_VERSION} manifest")
+        return None
+    return manifest
+
+def read_shard(shard_file: str) -> Dict[str, str]:
+    with open(shard_file, 'r') as f:
+        return pbj.SortedDict(json.load(f))
+
+def remove_shard(shard_file: str) -> None:
+    try:
+        os.remove(shard_file)
+    except FileNotFoundError:
+        pass
+
+def replace_bookmarks(manifest_file: str, bookmarks: Dict[str, Dict[str, str]]) -> bool:
+    """
+    Writes all of `bookmarks` (sorted) as shards and a new manifest,
+    creating the shard directory if needed. Shards left from
+    categories no longer in `bookmarks` are removed. Used by
+    `pbj --migrate shards`.
+    """
+    shard_dir: str = os.path.dirname(manifest_file)
+    files: Dict[str, str] = {category: shard_name(category) for category in bookmarks}
+    try:
+        os.makedirs(shard_dir, exist_ok=True)
+        for category, items in bookmarks.items():
+            pbj.write_file_atomically(os.path.join(shard_dir, files[category]), json.dumps(items, indent=4), durable=True)
+        write_manifest(manifest_file, files)
+        kept: set[str] = set(files.values()) | {os.path.basename(manifest_file)}
+        for name in os.listdir(shard_dir):
+            if name.endswith(".json") and name not in kept:
+                remove_shard(os.path.join(shard_dir, name))
+    except OSError as e:
+        print(f"replace_bookmarks() ({shard_dir}): {type(e).__name__}: {e}")
+        return False
+    return True
+
+def set_default_category(manifest_file: str, category: str) -> bool:
+    """Records `category` as the default in the manifest, keeping its categories."""
+    manifest: Dict[str, object] = read_manifest(manifest_file)
+    if manifest is None:
+        return False
+    try:
+        write_manifest(manifest_file, manifest["categories"], category)
+    except OSError as e:
+        print(f"set_default_category(): {type(e).__name__}: {e}")
+        return False
+    return True
+
+def check_default_category(manifest_file: str, category: str) -> bool:
+    """
+    Returns True if the manifest records `category`, the default
+    category of config.json. Otherwise (config.json edited by hand,
+    or shards from another install), says so and records `category`:
+    config.json, which the user edits, wins.
+    """
+    manifest: Dict[str, object] = read_manifest(manifest_file)
+    if manifest is None or manifest.get("default_category") == category:
+        return manifest is not None
+    print(f"{manifest_file} had '{manifest.get('default_category')}' as the default category, config.json has '{category}'. Using '{category}'.")
+    set_default_category(manifest_file, category)
+    return False
+
+def shard_name(category: str) -> str:
+    """
+    Returns the name of the shard file of `category`, e.g.
+    "work.534e6880.json": the name folded to lower case, for reading,
+    then a CRC-32 of the exact name, which tells "Work" from "work"
+    where the file system doesn't (and "manifest" from the manifest).
+    """
+    return f"{category.casefold()}.{zlib.crc32(category.encode()):08x}.json"
+
+def write_manifest(manifest_file: str, files: Dict[str, str], default_category: str = None) -> None:
+    manifest: Dict[str, object] = {
+        "version": MANIFEST_VERSION,
+        "default_category": default_category or pbj.get_config_value(),
+        # in category order
+        "categories": {category: files[category] for category in sorted(files)},
+    }
+    pbj.write_file_atomically(manifest_file, json.dumps(manifest, indent=4), durable=True)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import sqlite3
+from typing import Dict, Tuple
+
+# Each bookmark is one row. The (category, key) primary key keeps rows
+# in the same order as `sort_bookmarks()`, so speed-dial numbers are
+# positions in an ordered index scan; no sorting on load, and no
+# renumbering on insert. Categories have their own table so that empty
+# categories survive, and renames/deletes cascade to their bookmarks.
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bookmarks (
+    category TEXT NOT NULL REFERENCES categories(name) ON UPDATE CASCADE ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (category, key)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS bookmarks_category_path ON bookmarks(category, path);
+CREATE INDEX IF NOT EXISTS bookmarks_path ON bookmarks(path);
+"""
+
+def apply_change(db_file: str, change: Tuple[str, ...]) -> bool:
+    """
+    Applies one change, as passed to `pbj.commit_change()`, as a
+    single-row statement in its own transaction:
+    - `("save", category, key, path)`
+    - `("delete_key", category, key)`
+    - `("delete_category", category)`
+    - `("rename_key", category, old_key, new_key)`
+    - `("rename_category", old_category, new_category)`
+    """
+    return apply_changes(db_file, [change])
+
+def apply_changes(db_file: str, changes: list[Tuple[str, ...]]) -> bool:
+    """Applies `changes` (see `apply_change()`) in order, in one transaction."""
+    statements: list[Tuple[str, Tuple[str, ...]]] = []
+    for change in changes:
+        change_sql: list[Tuple[str, Tuple[str, ...]]] = change_statements(change)
+        if not change_sql:
+            print(f"apply_change(): unknown change '{change[0]}'")
+            return False
+        statements.extend(change_sql)
+
+    try:
+        conn: sqlite3.Connection = connect(db_file)
+        with conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"sqlite3 error in apply_changes() ({db_file}): {type(e).__name__}: {e}")
+        return False
+    return True
+
+def change_statements(change: Tuple[str, ...]) -> list[Tuple[str, Tuple[str, ...]]]:
+    """Returns the statements (sql, params) for one change, or `[]` for an unknown one."""
+    op, args = change[0], change[1:]
+    statements: list[Tuple[str, Tuple[str, ...]]] = []
+    if op == "save":
+        category, key, path = args
+        # another key holding the path in the category: as with json
+        # storage, where `pbj.remove_duplicate_values()` then keeps the
+        # key that sorts first (and `pbj.commit_changes()` reports the
+        # other), whichever of the two sorts last is not kept. REPLACE
+        # alone would drop the other key, whatever its place.
+        statements = [
+            ("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,)),
+            ("DELETE FROM bookmarks WHERE category = ? AND path = ? AND key > ?", (category, path, key)),
+            (
+                "INSERT OR REPLACE INTO bookmarks (category, key, path) SELECT ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM bookmarks WHERE category = ? AND path = ? AND key < ?)",
+                (category, key, path, category, path, key),
+            ),
+        ]
+    elif op == "delete_key":
+        statements = [("DELETE FROM bookmarks WHERE category = ? AND key = ?", args)]
+    elif op == "delete_category":
+        statements = [("DELETE FROM categories WHERE name = ?", args)]
+    elif op == "rename_key":
+        category, old_key, new_key = args
+        statements = [("UPDATE bookmarks SET key = ? WHERE category = ? AND key = ?", (new_key, category, old_key))]
+    elif op == "rename_category":
+        old_category, new_category = args
+        statements = [("UPDATE categories SET name = ? WHERE name = ?", (new_category, old_category))]
+    return statements
+
+def connect(db_file: str) -> sqlite3.Connection:
+    conn: sqlite3.Connection = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+def load_bookmarks(db_file: str) -> Dict[str, Dict[str, str]]:
+    """
+    Returns all bookmarks, ordered like `pbj.sort_bookmarks()` by
+    the primary keys, or `{}` if the database can't be read.
+    """
+    bookmarks: Dict[str, Dict[str, str]] = {}
+    try:
+        conn: sqlite3.Connection = connect(db_file)
+        for (name,) in conn.execute("SELECT name FROM categories ORDER BY name"):
+            bookmarks[name] = {}
+        for category, key, path in conn.execute("SELECT category, key, path FROM bookmarks ORDER BY category, key"):
+            bookmarks[category][key] = path
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"sqlite3 error in load_bookmarks() ({db_file}): {type(e).__name__}: {e}")
+    return bookmarks
+
+def replace_bookmarks(db_file: str, bookmarks: Dict[str, Dict[str, str]]) -> bool:
+    """Replaces the whole database with `bookmarks` in one transaction (migration)."""
+    try:
+        conn: sqlite3.Connection = connect(db_file)
+        with conn:
+            conn.execute("DELETE FROM categories")
+            conn.executemany("INSERT INTO categories (name) VALUES (?)", ((c,) for c in bookmarks))
+            # a path held by several keys (a hand edit) keeps the first,
+            # as `pbj.remove_duplicate_values()` does
+            conn.executemany(
+                "INSERT OR IGNORE INTO bookmarks (category, key, path) VALUES (?, ?, ?)",
+                ((c, k, p) for c, items in bookmarks.items() for k, p in items.items()),
+            )
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"sqlite3 error in replace_bookmarks() ({db_file}): {type(e).__name__}: {e}")
+        return False
+    return True